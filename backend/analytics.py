@@ -0,0 +1,215 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .sessions import SessionStore
+
+load_dotenv()
+
+# Cohort analytics settings, tunable from the environment
+ANALYTICS_REFRESH_BATCH = int(os.getenv('ANALYTICS_REFRESH_BATCH', '10000'))
+
+# Score histograms use one bin per whole point, 0 through 10
+SCORE_BINS = 11
+
+
+class _Column:
+    """Growable NumPy column with amortized O(1) appends."""
+
+    def __init__(self, dtype, width: int = 0):
+        self._shape_tail = (width,) if width else ()
+        self.data = np.zeros((64,) + self._shape_tail, dtype=dtype)
+        self.size = 0
+
+    def reserve(self, size: int) -> None:
+        if size > len(self.data):
+            grown = np.zeros((max(size, 2 * len(self.data)),) + self._shape_tail, dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.size = max(self.size, size)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self.data[:self.size]
+
+
+class CohortAnalytics:
+    """Columnar, incrementally maintained statistics over every recorded evaluation.
+
+    Rows are read from the session store's response log in ``seq`` order,
+    and only rows newer than the last one seen are fetched. Every worker
+    therefore converges on the same numbers without rescanning the log.
+    Scores are kept in NumPy columns, and per-question and per-interview
+    sums and histograms are updated with vectorized scatter-adds. A summary
+    costs time proportional to the number of questions and interviews, not
+    answers. When a question is answered again in the same interview, the
+    new answer replaces the old one in every aggregate.
+    """
+
+    def __init__(self, store: SessionStore, pass_threshold: float, refresh_batch: int = ANALYTICS_REFRESH_BATCH):
+        self.store = store
+        self.pass_threshold = pass_threshold
+        self.refresh_batch = max(1, refresh_batch)
+        self.last_seq = 0
+        self._lock = threading.Lock()
+
+        # One row per answer
+        self._technical = _Column(np.float64)
+        self._communication = _Column(np.float64)
+        self._question = _Column(np.int64)
+        self._interview = _Column(np.int64)
+        self._latest: Dict[Tuple[int, int], int] = {}
+
+        # One row per distinct question text
+        self._question_codes: Dict[str, int] = {}
+        self._question_texts: List[str] = []
+        self._question_count = _Column(np.int64)
+        self._question_passed = _Column(np.int64)
+        self._question_technical = _Column(np.float64)
+        self._question_communication = _Column(np.float64)
+        self._question_technical_hist = _Column(np.int64, SCORE_BINS)
+        self._question_communication_hist = _Column(np.int64, SCORE_BINS)
+
+        # One row per interview
+        self._interview_codes: Dict[str, int] = {}
+        self._interview_count = _Column(np.int64)
+        self._interview_technical = _Column(np.float64)
+        self._interview_communication = _Column(np.float64)
+
+        # Running moments for the technical/communication correlation
+        self._moments = np.zeros(6)  # n, sum t, sum c, sum t*t, sum c*c, sum t*c
+
+    def _code(self, codes: Dict[str, int], key: str, texts: Optional[List[str]] = None) -> int:
+        code = codes.get(key)
+        if code is None:
+            code = codes[key] = len(codes)
+            if texts is not None:
+                texts.append(key)
+        return code
+
+    def refresh(self) -> int:
+        """Fold in log rows written since the last refresh and return how many there were."""
+        with self._lock:
+            added = 0
+            while True:
+                rows = self.store.responses_since(self.last_seq, self.refresh_batch)
+                if not rows:
+                    return added
+                self._apply(rows)
+                self.last_seq = rows[-1][0]
+                added += len(rows)
+
+    def _apply(self, rows: List[Tuple]) -> None:
+        start = self._technical.size
+        count = len(rows)
+        technical = np.empty(count)
+        communication = np.empty(count)
+        questions = np.empty(count, dtype=np.int64)
+        interviews = np.empty(count, dtype=np.int64)
+        replaced = []
+
+        # Dictionary lookups are per row; all arithmetic below is vectorized
+        for i, (_, session_id, question_index, question, analysis) in enumerate(rows):
+            scores = json.loads(analysis)
+            technical[i] = scores['technical_score']
+            communication[i] = scores['communication_score']
+            questions[i] = self._code(self._question_codes, question or '', self._question_texts)
+            interviews[i] = self._code(self._interview_codes, session_id)
+            previous = self._latest.get((interviews[i], question_index))
+            if previous is not None:
+                replaced.append(previous)
+            self._latest[(interviews[i], question_index)] = start + i
+
+        for column, values in ((self._technical, technical), (self._communication, communication),
+                               (self._question, questions), (self._interview, interviews)):
+            column.reserve(start + count)
+            column.data[start:start + count] = values
+        for column in (self._question_count, self._question_passed, self._question_technical,
+                       self._question_communication, self._question_technical_hist,
+                       self._question_communication_hist):
+            column.reserve(len(self._question_codes))
+        for column in (self._interview_count, self._interview_technical, self._interview_communication):
+            column.reserve(len(self._interview_codes))
+
+        self._accumulate(np.arange(start, start + count), 1)
+        if replaced:
+            self._accumulate(np.asarray(replaced), -1)
+
+    def _accumulate(self, rows: np.ndarray, sign: int) -> None:
+        technical = self._technical.data[rows]
+        communication = self._communication.data[rows]
+        questions = self._question.data[rows]
+        interviews = self._interview.data[rows]
+        passed = (technical + communication) / 2 >= self.pass_threshold
+
+        np.add.at(self._question_count.data, questions, sign)
+        np.add.at(self._question_passed.data, questions, sign * passed)
+        np.add.at(self._question_technical.data, questions, sign * technical)
+        np.add.at(self._question_communication.data, questions, sign * communication)
+        np.add.at(self._question_technical_hist.data, (questions, self._bins(technical)), sign)
+        np.add.at(self._question_communication_hist.data, (questions, self._bins(communication)), sign)
+
+        np.add.at(self._interview_count.data, interviews, sign)
+        np.add.at(self._interview_technical.data, interviews, sign * technical)
+        np.add.at(self._interview_communication.data, interviews, sign * communication)
+
+        self._moments += sign * np.array([
+            len(rows), technical.sum(), communication.sum(),
+            (technical * technical).sum(), (communication * communication).sum(), (technical * communication).sum()
+        ])
+
+    @staticmethod
+    def _bins(scores: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint(scores), 0, SCORE_BINS - 1).astype(np.int64)
+
+    def summary(self, top_questions: int = 20) -> Dict:
+        """Return cohort statistics, refreshing from the log first."""
+        self.refresh()
+        with self._lock:
+            n, sum_t, sum_c, sum_tt, sum_cc, sum_tc = self._moments
+            answers = int(round(n))
+            correlation = None
+            if answers > 1:
+                var_t = sum_tt / n - (sum_t / n) ** 2
+                var_c = sum_cc / n - (sum_c / n) ** 2
+                if var_t > 1e-12 and var_c > 1e-12:
+                    correlation = float((sum_tc / n - sum_t * sum_c / n ** 2) / np.sqrt(var_t * var_c))
+
+            counts = self._interview_count.values
+            answered = counts > 0
+            overall = (self._interview_technical.values[answered] + self._interview_communication.values[answered]) \
+                / (2 * counts[answered])
+            histogram, _ = np.histogram(overall, bins=SCORE_BINS, range=(-0.5, SCORE_BINS - 0.5))
+
+            question_counts = self._question_count.values
+            order = np.argsort(-question_counts, kind='stable')[:max(0, top_questions)]
+            order = order[question_counts[order] > 0]
+            question_stats = [
+                {
+                    "question": self._question_texts[q],
+                    "answers": int(question_counts[q]),
+                    "technical_mean": float(self._question_technical.data[q] / question_counts[q]),
+                    "communication_mean": float(self._question_communication.data[q] / question_counts[q]),
+                    "pass_rate": float(self._question_passed.data[q] / question_counts[q]),
+                    "technical_histogram": self._question_technical_hist.data[q].tolist(),
+                    "communication_histogram": self._question_communication_hist.data[q].tolist(),
+                }
+                for q in order
+            ]
+
+            return {
+                "pass_threshold": self.pass_threshold,
+                "answers": answers,
+                "interviews": int(answered.sum()),
+                "technical_mean": float(sum_t / n) if answers else None,
+                "communication_mean": float(sum_c / n) if answers else None,
+                "interview_pass_rate": float((overall >= self.pass_threshold).mean()) if overall.size else None,
+                "interview_score_histogram": histogram.tolist(),
+                "technical_communication_correlation": correlation,
+                "distinct_questions": int((question_counts > 0).sum()),
+                "questions": question_stats,
+            }
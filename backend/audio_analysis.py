@@ -0,0 +1,94 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Voice activity detection settings, tunable from the environment
+VAD_FRAME_MS = int(os.getenv('VAD_FRAME_MS', '20'))
+VAD_SPEECH_TO_NOISE_RATIO = float(os.getenv('VAD_SPEECH_TO_NOISE_RATIO', '3.0'))
+# Absolute RMS floor in 16-bit units so a silent room is never treated as speech
+VAD_MIN_SPEECH_RMS = float(os.getenv('VAD_MIN_SPEECH_RMS', '300'))
+VAD_MIN_SPEECH_MS = int(os.getenv('VAD_MIN_SPEECH_MS', '100'))
+VAD_MAX_PAUSE_MS = int(os.getenv('VAD_MAX_PAUSE_MS', '400'))
+VAD_PADDING_MS = int(os.getenv('VAD_PADDING_MS', '150'))
+
+
+def frame_energies(samples: np.ndarray, sample_rate: int, frame_ms: int = VAD_FRAME_MS) -> Tuple[np.ndarray, int]:
+    """Return the RMS energy of every full frame and the frame length in samples."""
+    frame = max(1, sample_rate * frame_ms // 1000)
+    n_frames = len(samples) // frame
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1)), frame
+
+
+def noise_floor(energies: np.ndarray) -> float:
+    """Estimate background noise as the 10th percentile of frame energy."""
+    if energies.size == 0:
+        return 0.0
+    return float(np.percentile(energies, 10))
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # Start (inclusive) and end (exclusive) indices of each run of True values
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _fill(length: int, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # Boolean mask with every [start, end) range set, built from a cumulative sum
+    delta = np.zeros(length + 1, dtype=np.int32)
+    np.add.at(delta, np.minimum(starts, length), 1)
+    np.add.at(delta, np.minimum(ends, length), -1)
+    return np.cumsum(delta[:-1]) > 0
+
+
+def detect_speech(samples: np.ndarray, sample_rate: int) -> List[Tuple[int, int]]:
+    """Find voiced regions as ``(start, end)`` sample ranges.
+
+    Frames louder than the noise floor times ``VAD_SPEECH_TO_NOISE_RATIO``
+    count as speech. Pauses shorter than ``VAD_MAX_PAUSE_MS`` are bridged,
+    blips shorter than ``VAD_MIN_SPEECH_MS`` are dropped, and each region is
+    padded by ``VAD_PADDING_MS``; regions that then touch are merged.
+    """
+    energies, frame = frame_energies(samples, sample_rate)
+    if energies.size == 0:
+        return []
+
+    threshold = max(noise_floor(energies) * VAD_SPEECH_TO_NOISE_RATIO, VAD_MIN_SPEECH_RMS)
+    voiced = energies > threshold
+
+    # Bridge short pauses between words
+    starts, ends = _runs(~voiced)
+    short = (ends - starts <= VAD_MAX_PAUSE_MS // VAD_FRAME_MS) & (starts > 0) & (ends < len(voiced))
+    voiced |= _fill(len(voiced), starts[short], ends[short])
+
+    # Drop blips, then pad what is left so word onsets are kept
+    starts, ends = _runs(voiced)
+    keep = (ends - starts) >= max(1, VAD_MIN_SPEECH_MS // VAD_FRAME_MS)
+    padding = VAD_PADDING_MS // VAD_FRAME_MS
+    voiced = _fill(len(voiced), np.maximum(starts[keep] - padding, 0), ends[keep] + padding)
+
+    starts, ends = _runs(voiced)
+    # A region running to the last frame also keeps the trailing partial frame
+    ends = np.where(ends == len(voiced), len(samples), ends * frame)
+    return list(zip((starts * frame).tolist(), ends.tolist()))
+
+
+def extract_speech(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Return only the voiced parts of ``samples``, joined with short gaps.
+
+    Returns an empty array when no speech is found.
+    """
+    segments = detect_speech(samples, sample_rate)
+    if not segments:
+        return samples[:0]
+    gap = np.zeros(sample_rate * VAD_PADDING_MS // 1000, dtype=samples.dtype)
+    parts = []
+    for start, end in segments:
+        if parts:
+            parts.append(gap)
+        parts.append(samples[start:end])
+    return np.concatenate(parts)
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Evaluation cache settings, tunable from the environment
+EVALUATION_CACHE_SIZE = int(os.getenv('EVALUATION_CACHE_SIZE', '1024'))
+EVALUATION_CACHE_PATH = os.getenv('EVALUATION_CACHE_PATH', 'evaluation_cache.sqlite3')
+EVALUATION_CACHE_FLUSH_INTERVAL = float(os.getenv('EVALUATION_CACHE_FLUSH_INTERVAL', '0.5'))
+EVALUATION_CACHE_BUSY_TIMEOUT = float(os.getenv('EVALUATION_CACHE_BUSY_TIMEOUT', '5'))
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially different submissions share a key."""
+    return ' '.join(text.split())
+
+
+class EvaluationCache:
+    """Content-addressed cache of response evaluations.
+
+    Entries are keyed on a hash of the normalized answer, the question, the
+    model and the prompt version. Lookups hit an in-memory LRU first and fall
+    back to a local SQLite table, so cached evaluations also survive restarts.
+    The table is read in a thread and written in batches every
+    ``flush_interval`` seconds, so the event loop never waits on another
+    worker's lock; only the LRU is touched on the loop. Rows written under
+    a different prompt version are dropped on startup.
+    """
+
+    def __init__(self, prompt_version: str, path: Optional[str] = EVALUATION_CACHE_PATH,
+                 max_entries: int = EVALUATION_CACHE_SIZE, flush_interval: float = EVALUATION_CACHE_FLUSH_INTERVAL,
+                 busy_timeout: float = EVALUATION_CACHE_BUSY_TIMEOUT):
+        self.prompt_version = prompt_version
+        self.max_entries = max(1, max_entries)
+        self.flush_interval = flush_interval
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[str, Dict]" = OrderedDict()
+        self._pending: Dict[str, Tuple] = {}
+        # The memory tier and the database have separate locks, so a slow disk call never blocks a memory hit
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._flush_task: Optional[asyncio.Task] = None
+
+        if path:
+            self._db = sqlite3.connect(path, timeout=busy_timeout, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS evaluations ("
+                "key TEXT PRIMARY KEY, prompt_version TEXT NOT NULL, analysis TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self.invalidate(stale_only=True)
+
+    def make_key(self, text: str, question: Optional[str], model: Optional[str]) -> str:
+        payload = json.dumps(
+            [normalize_text(text), normalize_text(question or ''), model or '', self.prompt_version]
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    async def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return dict(self._lru[key])
+            # Evicted from the LRU before its batched write
+            row = self._pending[key][2:3] if key in self._pending else None
+
+        if row is None and self._db is not None:
+            row = await asyncio.to_thread(self._read, key)
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            analysis = json.loads(row[0])
+            self._remember(key, analysis)
+            self.disk_hits += 1
+            return dict(analysis)
+
+    def _read(self, key: str) -> Optional[Tuple]:
+        with self._db_lock:
+            if self._db is None:
+                return None
+            return self._db.execute("SELECT analysis FROM evaluations WHERE key = ?", (key,)).fetchone()
+
+    def put(self, key: str, analysis: Dict) -> None:
+        """Cache an evaluation in memory and queue it for the next batched write."""
+        with self._lock:
+            self._remember(key, dict(analysis))
+            if self._db is not None:
+                self._pending[key] = (key, self.prompt_version, json.dumps(analysis), time.time())
+
+    def flush(self) -> int:
+        """Write all queued evaluations in one transaction and return how many were written."""
+        with self._lock:
+            if not self._pending:
+                return 0
+            batch: List[Tuple] = list(self._pending.values())
+            self._pending = {}
+        with self._db_lock:
+            if self._db is None:
+                return 0
+            self._db.executemany(
+                "INSERT OR REPLACE INTO evaluations (key, prompt_version, analysis, created_at) VALUES (?, ?, ?, ?)",
+                batch
+            )
+            self._db.commit()
+        return len(batch)
+
+    def start(self) -> None:
+        if self._db is not None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await asyncio.to_thread(self.flush)
+            except sqlite3.Error as e:
+                print(f"Error writing cached evaluations: {e}")
+
+    def _remember(self, key: str, analysis: Dict) -> None:
+        self._lru[key] = analysis
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def invalidate(self, stale_only: bool = False) -> int:
+        """Drop cached evaluations and return how many rows were deleted.
+
+        With ``stale_only`` only entries from other prompt versions are removed.
+        """
+        with self._lock:
+            if not stale_only:
+                self._lru.clear()
+                self._pending = {}
+        with self._db_lock:
+            if self._db is None:
+                return 0
+            if stale_only:
+                cursor = self._db.execute("DELETE FROM evaluations WHERE prompt_version != ?", (self.prompt_version,))
+            else:
+                cursor = self._db.execute("DELETE FROM evaluations")
+            self._db.commit()
+            return cursor.rowcount
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._lru),
+            }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
@@ -0,0 +1,133 @@
+import asyncio
+import math
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar('T')
+
+# Hedging settings, tunable from the environment
+LLM_HEDGE_ENABLED = os.getenv('LLM_HEDGE_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+LLM_HEDGE_MIN_DELAY = float(os.getenv('LLM_HEDGE_MIN_DELAY', '1.0'))
+LLM_HEDGE_BUDGET = float(os.getenv('LLM_HEDGE_BUDGET', '0.05'))
+LLM_LATENCY_WINDOW = int(os.getenv('LLM_LATENCY_WINDOW', '500'))
+
+
+class LatencyWindow:
+    """Sliding window of recent call latencies with percentile lookups."""
+
+    def __init__(self, size: int = LLM_LATENCY_WINDOW):
+        self._samples: Deque[float] = deque(maxlen=max(1, size))
+        self._sorted: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        self._samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        if self._sorted is None:
+            # Sorted lazily and reused until the next sample arrives
+            self._sorted = sorted(self._samples)
+        rank = max(0, math.ceil(percentile / 100 * len(self._sorted)) - 1)
+        return self._sorted[min(rank, len(self._sorted) - 1)]
+
+
+class Hedger:
+    """Sends a backup request when the first one is slower than usual.
+
+    Once the primary attempt has been in flight longer than the configured
+    percentile of recent latencies, an identical backup is started. The
+    first successful answer wins and the other attempt is cancelled. Backups
+    are limited to ``budget`` times the number of requests, which caps the
+    extra spend.
+    """
+
+    def __init__(self, enabled: bool = LLM_HEDGE_ENABLED, percentile: float = LLM_HEDGE_PERCENTILE,
+                 min_samples: int = LLM_HEDGE_MIN_SAMPLES, min_delay: float = LLM_HEDGE_MIN_DELAY,
+                 budget: float = LLM_HEDGE_BUDGET, window: int = LLM_LATENCY_WINDOW):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.budget = budget
+        self.latencies = LatencyWindow(window)
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def observe(self, seconds: float) -> None:
+        self.latencies.observe(seconds)
+
+    def hedge_delay(self) -> Optional[float]:
+        if not self.enabled or len(self.latencies) < self.min_samples:
+            return None
+        return max(self.min_delay, self.latencies.percentile(self.percentile))
+
+    def _take_budget(self) -> bool:
+        if self.hedges + 1 > self.budget * self.requests:
+            return False
+        self.hedges += 1
+        return True
+
+    async def run(self, attempt: Callable[[Optional[asyncio.Event]], Awaitable[T]]) -> T:
+        """Run ``attempt``, hedging it if it is slow.
+
+        ``attempt`` receives an event that it sets once the request has
+        actually been sent. The hedge delay is measured from that moment,
+        so time spent waiting in the scheduler queue does not count.
+        """
+        self.requests += 1
+        delay = self.hedge_delay()
+        if delay is None:
+            return await attempt(None)
+
+        started = asyncio.Event()
+        primary = asyncio.ensure_future(attempt(started))
+        started_wait = asyncio.ensure_future(started.wait())
+        tasks = {primary}
+        try:
+            await asyncio.wait({primary, started_wait}, return_when=asyncio.FIRST_COMPLETED)
+            if not primary.done():
+                await asyncio.wait({primary}, timeout=delay)
+            if primary.done() or not self._take_budget():
+                return await primary
+
+            backup = asyncio.ensure_future(attempt(None))
+            tasks.add(backup)
+            first_error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+                    first_error = first_error or task.exception()
+            raise first_error
+        finally:
+            # Cancel whichever attempt lost the race
+            started_wait.cancel()
+            for task in tasks:
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "hedge_delay": self.hedge_delay(),
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p50_latency": self.latencies.percentile(50),
+            "p99_latency": self.latencies.percentile(99),
+        }
@@ -0,0 +1,122 @@
+import asyncio
+import os
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from .hedging import Hedger
+from .metrics import LLM_TOKENS
+from .scheduler import PRIORITY_INTERACTIVE, LLMScheduler
+
+# The SDK is a large share of the API's import time, so it loads with the first client
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+load_dotenv()
+
+# Connection pool settings, tunable from the environment
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '64'))
+LLM_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('LLM_MAX_KEEPALIVE_CONNECTIONS', '32'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '30'))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+
+_client: Optional['AsyncOpenAI'] = None
+
+# Every chat-completion call in the process goes through this scheduler
+scheduler = LLMScheduler()
+
+# Interactive calls can be hedged against slow upstream responses
+hedger = Hedger()
+
+
+def get_client() -> 'AsyncOpenAI':
+    """Return the process-wide async OpenAI client, creating it on first use.
+
+    All requests share one httpx connection pool so TLS connections to the
+    API are reused across candidates instead of being re-established per call.
+    """
+    global _client
+    if _client is None:
+        import httpx
+        from openai import AsyncOpenAI
+
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(LLM_TIMEOUT, connect=10.0),
+        )
+        # Retries are handled by the scheduler, which also adapts concurrency to 429s
+        _client = AsyncOpenAI(api_key=os.getenv('OPENAI_API_KEY'), http_client=http_client, max_retries=0)
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def record_usage(usage) -> None:
+    if usage is not None:
+        LLM_TOKENS.inc(usage.prompt_tokens or 0, type='prompt')
+        LLM_TOKENS.inc(usage.completion_tokens or 0, type='completion')
+
+
+async def chat_completion(messages: List[Dict[str, str]], priority: int = PRIORITY_INTERACTIVE, **kwargs):
+    """Run a chat completion through the scheduler without blocking the event loop.
+
+    Interactive calls are hedged when hedging is enabled. Raises
+    ``LLMUnavailableError`` when retries run out or the circuit is open.
+    """
+    async def create(started: Optional[asyncio.Event] = None):
+        if started is not None:
+            started.set()
+        call_start = time.perf_counter()
+        raw = await get_client().chat.completions.with_raw_response.create(
+            model=os.getenv('GPT_MODEL'),
+            messages=messages,
+            **kwargs
+        )
+        hedger.observe(time.perf_counter() - call_start)
+        scheduler.observe_headers(raw.headers)
+        completion = raw.parse()
+        record_usage(completion.usage)
+        return completion
+
+    if priority == PRIORITY_INTERACTIVE:
+        return await hedger.run(lambda started: scheduler.run(lambda: create(started), priority))
+    return await scheduler.run(create, priority)
+
+
+async def stream_chat_completion(messages: List[Dict[str, str]], priority: int = PRIORITY_INTERACTIVE,
+                                 **kwargs) -> AsyncIterator[str]:
+    """Yield the content deltas of a streamed chat completion.
+
+    Only opening the stream is retried; the scheduler slot is held until the
+    stream is fully consumed.
+    """
+    async def create():
+        raw = await get_client().chat.completions.with_raw_response.create(
+            model=os.getenv('GPT_MODEL'),
+            messages=messages,
+            stream=True,
+            # Token usage arrives in a final chunk with no choices
+            stream_options={"include_usage": True},
+            **kwargs
+        )
+        scheduler.observe_headers(raw.headers)
+        return raw.parse()
+
+    stream = await scheduler.run(create, priority, hold_slot=True)
+    try:
+        async for chunk in stream:
+            record_usage(chunk.usage)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    finally:
+        scheduler.release()
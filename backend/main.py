@@ -1,20 +1,34 @@
-from fastapi import FastAPI, UploadFile, File
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-import speech_recognition as sr
-from pydantic import BaseModel
-from typing import List, Dict
-import os
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from typing import AsyncIterator, List, Dict, Optional, Tuple, Union
 import json
-from openai import OpenAI
 from dotenv import load_dotenv
 
+from .metrics import ERRORS, MetricsMiddleware, render, timed
+from .models import (BatchEvaluation, BatchEvaluationRequest, InterviewSession, ResponseAnalysis, SpeechResponse,
+                     TranscribedAnalysis)
+from .scheduler import LLMUnavailableError
+from .service import (EvaluationUnavailable, InvalidRequest, QuestionsUnavailable, create_session as start_session,
+                      evaluate_answer, evaluate_interview as evaluate_all, get_cohort_analytics, get_evaluation_cache,
+                      get_question_bank, get_session, session_question, start, stop, stream_evaluation,
+                      take_questions, transcribe, transcription_stream)
+from .sessions import SessionNotFound
+from .transcription import TranscriptionQueueFull
+
 # Load environment variables from .env file
 load_dotenv()
 
-app = FastAPI()
+# The interview logic lives in backend.service; this module maps it onto HTTP
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start()
+    yield
+    await stop()
 
-# Initialize OpenAI client with API key from environment
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+app = FastAPI(lifespan=lifespan)
 
 # Enable CORS
 app.add_middleware(
@@ -23,15 +37,35 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
 
-class ResponseAnalysis(BaseModel):
-    technical_score: float
-    communication_score: float
-    feedback: str
+# Per-request and per-stage latency histograms, served on /metrics
+app.add_middleware(MetricsMiddleware)
+
+def llm_unavailable(error: LLMUnavailableError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(max(1, round(error.retry_after)))}
+    )
+
+async def resolve_question(session_id: Optional[str], question_index: Optional[int],
+                           question: Optional[str]) -> Optional[str]:
+    try:
+        return await session_question(session_id, question_index, question)
+    except SessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except InvalidRequest as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
-class SpeechResponse(BaseModel):
-    text: str
+async def evaluate(text: str, question: Optional[str], session_id: Optional[str],
+                   question_index: Optional[int]) -> ResponseAnalysis:
+    try:
+        return await evaluate_answer(text, question, session_id, question_index)
+    except LLMUnavailableError as e:
+        # Fail fast instead of recording a misleading 0/0 score
+        raise llm_unavailable(e)
 
 @app.get("/")
 async def read_root():
@@ -40,123 +74,168 @@ async def read_root():
 @app.get("/questions")
 async def get_questions() -> List[str]:
     try:
-        completion = client.chat.completions.create(
-            model=os.getenv('GPT_MODEL'),
-            messages=[
-                {"role": "system", "content": "You are an expert technical interviewer for backend developer positions. Generate challenging but fair questions that assess both theoretical knowledge and practical experience."}, 
-                {"role": "user", "content": "Generate 5 technical interview questions for a backend developer position, focusing on System Design, API Development, Database Management, Security, and Problem Solving. Return only a JSON array of question strings without any additional formatting or explanation."}
-            ]
-        )
-        
-        # Parse the response and handle potential JSON formatting
-        response_text = completion.choices[0].message.content.strip()
-        try:
-            # Try to parse the response directly
-            questions = json.loads(response_text)
-            if isinstance(questions, list) and len(questions) > 0:
-                return questions
-        except json.JSONDecodeError:
-            # If direct parsing fails, try to extract array from text
-            import re
-            array_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            if array_match:
-                try:
-                    questions = json.loads(array_match.group())
-                    if isinstance(questions, list) and len(questions) > 0:
-                        return questions
-                except:
-                    pass
-        
-        # Fallback to empty list in case of parsing issues
-        return []
-    except Exception as e:
-        print(f"Error generating questions: {e}")
-        # Return empty list in case of API issues
-        return []
+        return await take_questions()
+    except LLMUnavailableError as e:
+        raise llm_unavailable(e)
+
+@app.post("/sessions")
+async def create_session() -> InterviewSession:
+    try:
+        return InterviewSession(**await start_session())
+    except LLMUnavailableError as e:
+        raise llm_unavailable(e)
+    except QuestionsUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.get("/sessions/{session_id}")
+async def resume_session(session_id: str) -> InterviewSession:
+    try:
+        return InterviewSession(**await get_session(session_id))
+    except SessionNotFound as e:
+        raise HTTPException(status_code=404, detail=str(e))
 
 @app.post("/speech-to-text")
 async def speech_to_text(audio: UploadFile = File(...)) -> Dict[str, str]:
-    recognizer = sr.Recognizer()
-    
-    # Adjust recognizer parameters for better technical term recognition
-    recognizer.energy_threshold = 300  # Increased from default
-    recognizer.dynamic_energy_threshold = True
-    recognizer.dynamic_energy_adjustment_damping = 0.15
-    recognizer.dynamic_energy_ratio = 1.5
-    
     try:
-        # Save the uploaded audio file temporarily
-        audio_content = await audio.read()
-        with open("temp_audio.wav", "wb") as temp_file:
-            temp_file.write(audio_content)
-        
-        # Convert speech to text with improved settings
-        with sr.AudioFile("temp_audio.wav") as source:
-            # Adjust microphone settings
-            recognizer.adjust_for_ambient_noise(source, duration=0.5)
-            audio_data = recognizer.record(source)
-            text = recognizer.recognize_google(audio_data, language="en-US")
-            
+        # Keep the upload in memory so concurrent requests never share a file
+        with timed('read_upload'):
+            audio_content = await audio.read()
+        text = await transcribe(audio_content)
         return {"text": text}
+    except TranscriptionQueueFull as e:
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "1"})
     except Exception as e:
+        ERRORS.inc(stage='transcription')
         return {"error": str(e)}
 
 @app.post("/analyze-response")
 async def analyze_response(response: SpeechResponse) -> ResponseAnalysis:
-    if not response.text.strip():
-        return ResponseAnalysis(
-            technical_score=0.0,
-            communication_score=0.0,
-            feedback="Please provide a response before submitting."
-        )
+    question = await resolve_question(response.session_id, response.question_index, response.question)
+    return await evaluate(response.text, question, response.session_id, response.question_index)
+
+@app.websocket("/ws/transcribe")
+async def transcribe_stream(websocket: WebSocket):
+    """Transcribe audio while the candidate is still speaking.
+
+    The client sends a JSON config (``sample_rate``, optional ``question``,
+    or ``session_id`` and ``question_index`` to record the answer),
+    then binary frames of 16-bit mono PCM, then ``{"event": "stop"}``.
+    Partial transcripts are pushed as ``partial`` events. After the stop
+    event the server sends a ``final`` event with the full transcript and
+    its analysis, or an ``error`` event.
+    """
+    await websocket.accept()
+    send_lock = asyncio.Lock()
 
+    async def send(message: Dict) -> None:
+        async with send_lock:
+            await websocket.send_json(message)
+
+    async def on_segment(index: int, text: str) -> None:
+        await send({"event": "partial", "index": index, "text": text})
+
+    session = None
     try:
-        completion = client.chat.completions.create(
-            model=os.getenv('GPT_MODEL'),
-            messages=[
-                {"role": "system", "content": "You are an expert technical interviewer evaluating a backend developer candidate's response. Provide constructive feedback that highlights both strengths and areas for improvement."}, 
-                {"role": "user", "content": f"Evaluate this response to a backend development question:\n{response.text}\n\nProvide evaluation in JSON format with keys: technical_score (0-10), communication_score (0-10), and feedback (string)"}
-            ]
-        )
-        
-        # Extract and clean the response text
-        response_text = completion.choices[0].message.content.strip()
-        
-        # Try to parse the response as JSON, handling different formats
-        try:
-            # First attempt: direct JSON parsing
-            analysis = json.loads(response_text)
-        except json.JSONDecodeError:
-            # Second attempt: try to extract JSON-like structure and format it
-            import re
-            # Look for key-value pairs in the response
-            scores = re.findall(r'(["\']?(?:technical|communication)_score["\']?)\s*:\s*(\d+(?:\.\d+)?)', response_text, re.I)
-            feedback = re.search(r'["\']?feedback["\']?\s*:\s*["\']([^"]+)["\']', response_text)
-            
-            if scores and feedback:
-                analysis = {
-                    'technical_score': float(next(score[1] for score in scores if 'technical' in score[0].lower())),
-                    'communication_score': float(next(score[1] for score in scores if 'communication' in score[0].lower())),
-                    'feedback': feedback.group(1)
-                }
-            else:
-                # If no valid structure found, create a default response
-                analysis = {
-                    'technical_score': 0.0,
-                    'communication_score': 0.0,
-                    'feedback': 'Could not analyze response format. Please try rephrasing your answer.'
-                }
-        
-        # Ensure scores are within valid range
-        analysis['technical_score'] = max(0.0, min(10.0, float(analysis.get('technical_score', 0.0))))
-        analysis['communication_score'] = max(0.0, min(10.0, float(analysis.get('communication_score', 0.0))))
-        analysis['feedback'] = str(analysis.get('feedback', 'No feedback provided.'))
-        
-        return ResponseAnalysis(**analysis)
+        config = await websocket.receive_json()
+        question = await resolve_question(config.get('session_id'), config.get('question_index'), config.get('question'))
+        session = transcription_stream(config.get('sample_rate', 16000), on_segment)
+        while True:
+            message = await websocket.receive()
+            if message['type'] == 'websocket.disconnect':
+                session.cancel()
+                return
+            if message.get('bytes') is not None:
+                session.feed(message['bytes'])
+            elif message.get('text') and json.loads(message['text']).get('event') == 'stop':
+                break
+
+        text = await session.finish()
+        if not text:
+            await send({"event": "error", "error": "No speech was recognized. Please try again."})
+        else:
+            analysis = await evaluate(text, question, config.get('session_id'), config.get('question_index'))
+            await send({"event": "final", "text": text, "analysis": dict(analysis)})
+    except WebSocketDisconnect:
+        if session is not None:
+            session.cancel()
+        return
+    except HTTPException as e:
+        await send({"event": "error", "error": e.detail})
+    except InvalidRequest as e:
+        await send({"event": "error", "error": str(e)})
     except Exception as e:
-        print(f"Error in analyze_response: {str(e)}")
-        return ResponseAnalysis(
-            technical_score=0.0,
-            communication_score=0.0,
-            feedback=f"An error occurred while analyzing your response. Please try again."
-        )
\ No newline at end of file
+        if session is not None:
+            session.cancel()
+        await send({"event": "error", "error": str(e)})
+    await websocket.close()
+
+def sse_event(event: str, data: Dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def sse_stream(events: AsyncIterator[Tuple[str, Dict]]) -> AsyncIterator[str]:
+    async for event, data in events:
+        yield sse_event(event, data)
+
+@app.post("/analyze-response/stream")
+async def analyze_response_stream(response: SpeechResponse) -> StreamingResponse:
+    """Stream an evaluation as Server-Sent Events: ``score``, ``feedback``, then ``result`` or ``error``."""
+    question = await resolve_question(response.session_id, response.question_index, response.question)
+    return StreamingResponse(
+        sse_stream(stream_evaluation(response.text, question, response.session_id, response.question_index)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/transcribe-and-analyze")
+async def transcribe_and_analyze(audio: UploadFile = File(...), question: Optional[str] = Form(None),
+                                 session_id: Optional[str] = Form(None),
+                                 question_index: Optional[int] = Form(None)) -> TranscribedAnalysis:
+    # Voice answers are transcribed and evaluated in a single round trip
+    question = await resolve_question(session_id, question_index, question)
+    try:
+        with timed('read_upload'):
+            audio_content = await audio.read()
+        text = await transcribe(audio_content)
+    except TranscriptionQueueFull as e:
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "1"})
+    except Exception as e:
+        ERRORS.inc(stage='transcription')
+        return JSONResponse(status_code=422, content={"error": str(e)})
+
+    analysis = await evaluate(text, question, session_id, question_index)
+    return TranscribedAnalysis(text=text, analysis=analysis)
+
+@app.post("/evaluate-interview")
+async def evaluate_interview(request: BatchEvaluationRequest) -> BatchEvaluation:
+    """Evaluate every answer of an interview and return the overall verdict."""
+    try:
+        return await evaluate_all(request.answers, request.mode)
+    except InvalidRequest as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except LLMUnavailableError as e:
+        raise llm_unavailable(e)
+    except EvaluationUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.get("/evaluation-cache")
+async def evaluation_cache_stats() -> Dict[str, Union[int, float]]:
+    return get_evaluation_cache().stats()
+
+@app.delete("/evaluation-cache")
+async def clear_evaluation_cache() -> Dict[str, int]:
+    return {"deleted": await asyncio.to_thread(get_evaluation_cache().invalidate)}
+
+@app.get("/question-bank")
+async def question_bank_stats() -> Dict:
+    """Banked questions per topic and whether interviews are served from the bank."""
+    return await asyncio.to_thread(get_question_bank().stats)
+
+@app.get("/metrics")
+async def metrics() -> PlainTextResponse:
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/analytics/cohort")
+async def cohort_statistics(top_questions: int = 20) -> Dict:
+    """Cohort-wide pass rate, score distributions and per-question statistics."""
+    # Catching up on a large backlog is CPU and disk work, so keep it off the event loop
+    return await asyncio.to_thread(get_cohort_analytics().summary, top_questions)
@@ -0,0 +1,220 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Metrics settings, tunable from the environment
+METRICS_TIMING_HEADER = os.getenv('METRICS_TIMING_HEADER', 'false').lower() in ('1', 'true', 'yes')
+
+# Seconds; covers everything from a cache hit to a slow model call
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels, in Prometheus text format."""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [
+                f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels, in Prometheus text format."""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # Per label set: bucket counts (non-cumulative), sum, count
+        self._values: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = next(i for i, bound in enumerate(self.buckets) if value <= bound)
+        with self._lock:
+            series = self._values.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        labelnames = self.labelnames + ('le',)
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(labelnames, key + (_format_value(bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+_registry: List = []
+
+
+def register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def render() -> str:
+    """Return every registered metric in the Prometheus text exposition format."""
+    lines = []
+    for metric in _registry:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_SECONDS = register(Histogram(
+    'ai_recruiter_request_seconds', 'Time to serve a request, by route.', ('route', 'method', 'status')
+))
+STAGE_SECONDS = register(Histogram(
+    'ai_recruiter_stage_seconds', 'Time spent in each stage of a request, by route.', ('route', 'stage')
+))
+LLM_TOKENS = register(Counter(
+    'ai_recruiter_llm_tokens_total', 'Tokens reported by the model API in completion.usage.', ('type',)
+))
+PARSE_RESULTS = register(Counter(
+    'ai_recruiter_parse_results_total',
+    'Model outputs by parse outcome: clean JSON, JSON extracted from surrounding text, or failed.',
+    ('target', 'outcome')
+))
+FALLBACK_RESPONSES = register(Counter(
+    'ai_recruiter_fallback_responses_total', 'Placeholder evaluations returned instead of a model score.', ('reason',)
+))
+COALESCED_CALLS = register(Counter(
+    'ai_recruiter_coalesced_calls_total', 'Requests that shared an identical in-flight LLM call.', ('target',)
+))
+ERRORS = register(Counter(
+    'ai_recruiter_errors_total', 'Errors caught and logged while serving requests.', ('stage',)
+))
+QUESTION_SETS_SERVED = register(Counter(
+    'ai_recruiter_question_sets_served_total', 'Interview question sets served, by source: bank or pool.', ('source',)
+))
+QUESTION_BANK_INSERTS = register(Counter(
+    'ai_recruiter_question_bank_inserts_total', 'Questions offered to the bank, by outcome: added or duplicate.', ('outcome',)
+))
+
+# Stage timings of the request being served; shared with the tasks it spawns
+_request_stages: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar('request_stages', default=None)
+
+
+def record_stage(stage: str, seconds: float) -> None:
+    stages = _request_stages.get()
+    if stages is not None:
+        stages.append((stage, seconds))
+
+
+def detach_from_request() -> None:
+    """Stop recording stages for the current request in this task.
+
+    Background tasks started while serving a request inherit its context;
+    calling this keeps their work out of that request's timings.
+    """
+    _request_stages.set(None)
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time a block as one stage of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - started)
+
+
+def server_timing(stages: List[Tuple[str, float]]) -> str:
+    return ', '.join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in stages)
+
+
+class MetricsMiddleware:
+    """ASGI middleware that times each HTTP request and the stages recorded during it.
+
+    Observations are labelled with the route template (``/sessions/{session_id}``),
+    not the raw path, so label cardinality stays bounded. Streamed responses
+    are measured until their last chunk is sent. With ``timing_header`` the
+    stages finished before the response starts are returned in a
+    ``Server-Timing`` header.
+    """
+
+    def __init__(self, app, timing_header: bool = METRICS_TIMING_HEADER):
+        self.app = app
+        self.timing_header = timing_header
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stages: List[Tuple[str, float]] = []
+        token = _request_stages.set(stages)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                if self.timing_header and stages:
+                    headers = list(message.get('headers', []))
+                    headers.append((b'server-timing', server_timing(stages).encode('latin-1')))
+                    message = {**message, 'headers': headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stages.reset(token)
+            route = getattr(scope.get('route'), 'path', None)
+            if route is not None:
+                REQUEST_SECONDS.observe(time.perf_counter() - started, route=route, method=scope['method'], status=status)
+                for stage, seconds in stages:
+                    STAGE_SECONDS.observe(seconds, route=route, stage=stage)
@@ -0,0 +1,62 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ResponseAnalysis(BaseModel):
+    technical_score: float
+    communication_score: float
+    feedback: str
+
+
+class SpeechResponse(BaseModel):
+    text: str
+    question: Optional[str] = None
+    # When set, the evaluation is recorded in this interview session
+    session_id: Optional[str] = None
+    question_index: Optional[int] = None
+
+
+class TranscribedAnalysis(BaseModel):
+    text: str
+    analysis: ResponseAnalysis
+
+
+class InterviewResponse(BaseModel):
+    question_index: int
+    question: Optional[str] = None
+    text: str
+    analysis: ResponseAnalysis
+
+
+class InterviewSession(BaseModel):
+    session_id: str
+    questions: List[str]
+    current_question_index: int
+    responses: List[InterviewResponse]
+    created_at: float
+
+
+class InterviewAnswer(BaseModel):
+    question: str
+    text: str
+
+
+class BatchEvaluationRequest(BaseModel):
+    answers: List[InterviewAnswer]
+    # "packed" or "fanout"; defaults to BATCH_EVALUATION_MODE
+    mode: Optional[str] = None
+
+
+class InterviewVerdict(BaseModel):
+    technical_score: float
+    communication_score: float
+    overall_score: float
+    passed: bool
+
+
+class BatchEvaluation(BaseModel):
+    results: List[ResponseAnalysis]
+    verdict: InterviewVerdict
+    # Indices of answers that could not be scored; they are left out of the verdict
+    failed: List[int] = []
@@ -0,0 +1,388 @@
+import json
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from .models import ResponseAnalysis
+
+T = TypeVar('T')
+
+SCORE_FIELDS = ('technical_score', 'communication_score')
+
+_WHITESPACE = ' \t\r\n'
+_decoder = json.JSONDecoder(strict=False)
+
+# Lenient fallback for near-JSON replies: single-quoted or bare keys, and scores written as "8/10"
+_LENIENT_SCORE = re.compile(
+    r'''["']?\b(technical_score|communication_score)\b["']?\s*[:=]\s*["']?(-?\d+(?:\.\d+)?)(?:\s*/\s*(\d+(?:\.\d+)?))?''',
+    re.IGNORECASE
+)
+_LENIENT_FEEDBACK = re.compile(
+    r'''["']?\bfeedback\b["']?\s*[:=]\s*(?:"((?:[^"\\]|\\.)*)"|'((?:[^'\\]|\\.)*)'|([^\n]*))''',
+    re.IGNORECASE
+)
+
+
+class ParseError(ValueError):
+    """Raised when model output does not contain the expected structure."""
+
+
+def clamp_score(value) -> float:
+    """Coerce a score to a float within the 0-10 range."""
+    return max(0.0, min(10.0, float(value)))
+
+
+def _decode(text: str) -> Any:
+    # Non-strict decoding accepts raw newlines inside strings, which models often emit
+    return _decoder.decode(text)
+
+
+class JsonStreamExtractor:
+    """Single-pass extractor for a JSON object or array embedded in model output.
+
+    Text before the opening bracket (prose, a Markdown fence) and after the
+    matching closing bracket is ignored. Output can be fed in arbitrary
+    chunks; every character is scanned once. ``feed`` returns events as soon
+    as they are available:
+
+    - ``("member", key, value)`` when a top-level object member is complete
+    - ``("item", index, value)`` when a top-level array element is complete
+    - ``("delta", key, text)`` for newly arrived text of a top-level string
+      member, when ``stream_strings`` is enabled
+
+    Scanning starts at ``offset``, so a caller can look past an earlier
+    candidate in the same text without copying it.
+    """
+
+    def __init__(self, root: str = '{', stream_strings: bool = False, offset: int = 0):
+        if root not in ('{', '['):
+            raise ValueError("root must be '{' or '['")
+        self.root = root
+        self.stream_strings = stream_strings
+        self.buffer = ''
+        self.members: Dict[str, Any] = {}
+        self.items: List[Any] = []
+        self.error: Optional[str] = None
+        # Offsets in ``buffer`` of the opening bracket and just past the matching closing one, once found
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+
+        self._pos = offset
+        self._started = False
+        self._done = False
+        self._depth = 0
+        self._in_string = False
+        self._escape_start: Optional[int] = None
+        self._unicode_remaining = 0
+        self._expect = 'key' if root == '{' else 'value'
+        self._token_start: Optional[int] = None
+        self._key: Optional[str] = None
+        self._streamed_upto: Optional[int] = None
+
+    @property
+    def done(self) -> bool:
+        return self._done
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any, Any]]:
+        self.buffer += chunk
+        events: List[Tuple[str, Any, Any]] = []
+        buffer = self.buffer
+        end = len(buffer)
+
+        i = self._pos
+        while i < end and not self._done:
+            c = buffer[i]
+
+            if not self._started:
+                if c == self.root:
+                    self._started = True
+                    self.start = i
+                    self._depth = 1
+            elif self._in_string:
+                if self._escape_start is not None:
+                    if self._unicode_remaining:
+                        self._unicode_remaining -= 1
+                        if not self._unicode_remaining:
+                            self._escape_start = None
+                    elif c == 'u':
+                        self._unicode_remaining = 4
+                    else:
+                        self._escape_start = None
+                elif c == '\\':
+                    self._escape_start = i
+                elif c == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._close_top_level_string(i, events)
+            elif c == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._token_start = i
+                    if self._expect == 'value':
+                        self._expect = 'value_in'
+                        if self.stream_strings and self.root == '{':
+                            self._streamed_upto = i + 1
+            elif c in '{[':
+                if self._depth == 1 and self._expect == 'value':
+                    self._token_start = i
+                    self._expect = 'value_in'
+                self._depth += 1
+            elif c in '}]':
+                self._depth -= 1
+                if self._depth == 1 and self._expect == 'value_in':
+                    self._finish_value(i + 1, events)
+                elif self._depth == 0:
+                    if self._expect == 'value_in':
+                        self._finish_value(i, events)
+                    self._done = True
+                    self.end = i + 1
+            elif self._depth == 1:
+                if c == ':' and self._expect == 'colon':
+                    self._expect = 'value'
+                elif c == ',':
+                    if self._expect == 'value_in':
+                        self._finish_value(i, events)
+                    self._expect = 'key' if self.root == '{' else 'value'
+                elif c not in _WHITESPACE and self._expect == 'value':
+                    # Start of a number, true, false or null
+                    self._token_start = i
+                    self._expect = 'value_in'
+                elif c not in _WHITESPACE and self._expect == 'key':
+                    self._fail(f"expected a double-quoted object key, found {buffer[i:i + 20]!r}")
+            i += 1
+
+        self._pos = i
+        if self._in_string and self._streamed_upto is not None:
+            # Stop short of an escape sequence that has not fully arrived yet
+            safe_end = self._escape_start if self._escape_start is not None else end
+            self._emit_delta(safe_end, events)
+        return events
+
+    def _close_top_level_string(self, quote: int, events: List[Tuple[str, Any, Any]]) -> None:
+        if self.root == '{' and self._expect == 'key':
+            try:
+                self._key = _decode(self.buffer[self._token_start:quote + 1])
+            except ValueError as e:
+                self._fail(f"invalid object key: {e}")
+            self._expect = 'colon'
+        elif self._expect == 'value_in':
+            if self._streamed_upto is not None:
+                self._emit_delta(quote, events)
+                self._streamed_upto = None
+            self._finish_value(quote + 1, events)
+
+    def _emit_delta(self, upto: int, events: List[Tuple[str, Any, Any]]) -> None:
+        if upto <= self._streamed_upto:
+            return
+        try:
+            text = _decode(f'"{self.buffer[self._streamed_upto:upto]}"')
+        except ValueError:
+            return
+        self._streamed_upto = upto
+        if text:
+            events.append(("delta", self._key, text))
+
+    def _finish_value(self, end: int, events: List[Tuple[str, Any, Any]]) -> None:
+        raw = self.buffer[self._token_start:end].strip()
+        self._expect = 'comma'
+        try:
+            value = _decode(raw)
+        except ValueError as e:
+            self._fail(f"invalid value {raw[:40]!r}: {e}")
+            return
+        if self.root == '{':
+            self.members[self._key] = value
+            events.append(("member", self._key, value))
+        else:
+            self.items.append(value)
+            events.append(("item", len(self.items) - 1, value))
+
+    def _fail(self, reason: str) -> None:
+        if self.error is None:
+            self.error = reason
+
+    def result(self) -> Any:
+        """Return the extracted object or array, or raise ParseError explaining why not."""
+        kind = 'object' if self.root == '{' else 'array'
+        if not self._started:
+            raise ParseError(f"no JSON {kind} found in model output")
+        if self.error is not None:
+            raise ParseError(self.error)
+        if not self._done:
+            raise ParseError(f"model output ended before the JSON {kind} was complete")
+        return self.members if self.root == '{' else self.items
+
+
+def analysis_from_members(members: Dict[str, Any]) -> ResponseAnalysis:
+    """Validate parsed members into a ResponseAnalysis with clamped scores."""
+    scores = {}
+    for field in SCORE_FIELDS:
+        if field not in members:
+            raise ParseError(f"missing required field '{field}'")
+        try:
+            scores[field] = clamp_score(members[field])
+        except (TypeError, ValueError):
+            raise ParseError(f"field '{field}' is not a number: {members[field]!r}")
+    feedback = members.get('feedback')
+    return ResponseAnalysis(
+        feedback=str(feedback) if feedback is not None else 'No feedback provided.',
+        **scores
+    )
+
+
+def extract(text: str, root: str, accept: Callable[[Any], T]) -> T:
+    """Return ``accept`` applied to the first JSON candidate in ``text`` that it accepts.
+
+    Prose can contain brackets of its own, and a reply can wrap the expected
+    value in another one. When ``accept`` rejects a candidate with
+    ParseError, the values nested in it are tried, outermost first. When a
+    candidate is rejected or is not valid JSON, scanning resumes after its
+    closing bracket, so every character is still scanned once. If nothing
+    is accepted, the first candidate's error is raised.
+    """
+    first_error: Optional[ParseError] = None
+    offset = 0
+    while True:
+        extractor = JsonStreamExtractor(root, offset=offset)
+        extractor.feed(text)
+        try:
+            value = extractor.result()
+            try:
+                return accept(value)
+            except ParseError:
+                found, nested = _accept_nested(value, dict if root == '{' else list, accept)
+                if found:
+                    return nested
+                raise
+        except ParseError as e:
+            first_error = first_error or e
+            if extractor.end is None:
+                raise first_error
+            offset = extractor.end
+
+
+def _accept_nested(value: Any, kind: type, accept: Callable[[Any], T]) -> Tuple[bool, Optional[T]]:
+    children = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+    for child in children:
+        if isinstance(child, kind):
+            try:
+                return True, accept(child)
+            except ParseError:
+                pass
+    for child in children:
+        found, nested = _accept_nested(child, kind, accept)
+        if found:
+            return found, nested
+    return False, None
+
+
+def lenient_analysis(text: str) -> ResponseAnalysis:
+    """Recover an evaluation from near-JSON output, or raise ParseError naming the missing scores.
+
+    Accepts single-quoted or bare keys and scores written as ``8/10``, which
+    is rescaled to 0-10 when the denominator is not 10.
+    """
+    scores = {}
+    for match in _LENIENT_SCORE.finditer(text):
+        field, value, out_of = match.group(1).lower(), float(match.group(2)), match.group(3)
+        if field in scores:
+            continue
+        if out_of is not None and float(out_of) > 0:
+            value = value / float(out_of) * 10
+        scores[field] = clamp_score(value)
+    missing = [field for field in SCORE_FIELDS if field not in scores]
+    if missing:
+        raise ParseError(f"no {' or '.join(missing)} found in the text")
+
+    feedback = 'No feedback provided.'
+    match = _LENIENT_FEEDBACK.search(text)
+    if match is not None:
+        double_quoted, single_quoted, bare = match.groups()
+        if double_quoted is not None:
+            try:
+                feedback = _decode(f'"{double_quoted}"')
+            except ValueError:
+                feedback = double_quoted
+        elif single_quoted is not None:
+            feedback = single_quoted.replace("\\'", "'")
+        elif bare.strip(' ,}'):
+            feedback = bare.strip(' ,}')
+    return ResponseAnalysis(feedback=feedback, **scores)
+
+
+def parse_analysis(text: str) -> ResponseAnalysis:
+    """Parse complete model output into a ResponseAnalysis, falling back to ``lenient_analysis``."""
+    try:
+        return extract(text, '{', analysis_from_members)
+    except ParseError as e:
+        try:
+            return lenient_analysis(text)
+        except ParseError as lenient_error:
+            raise ParseError(f"{e}, and {lenient_error}") from e
+
+
+def parse_questions(text: str) -> List[str]:
+    """Parse complete model output into a non-empty list of question strings."""
+    return extract(text, '[', _questions_from_items)
+
+
+def _questions_from_items(questions: List[Any]) -> List[str]:
+    if not questions:
+        raise ParseError("model returned an empty question list")
+    if not all(isinstance(question, str) and question.strip() for question in questions):
+        raise ParseError("expected a JSON array of non-empty question strings")
+    return [question.strip() for question in questions]
+
+
+def parse_analyses(text: str, count: int) -> List[ResponseAnalysis]:
+    """Parse a JSON array of ``count`` evaluations, in the order they were requested."""
+    def accept(items: List[Any]) -> List[ResponseAnalysis]:
+        if len(items) != count:
+            raise ParseError(f"expected {count} evaluations, got {len(items)}")
+        if not all(isinstance(item, dict) for item in items):
+            raise ParseError("expected a JSON array of evaluation objects")
+        return [analysis_from_members(item) for item in items]
+
+    return extract(text, '[', accept)
+
+
+class AnalysisStreamParser:
+    """Turns a streamed evaluation into score and feedback events.
+
+    ``feed`` returns ``("score", {...})`` as soon as a score member is complete
+    and ``("feedback", {"delta": ...})`` for newly arrived feedback text.
+    ``result`` validates the finished output into a ResponseAnalysis.
+    Like ``extract``, a candidate object that closes without both scores
+    is dropped and scanning resumes after it.
+    """
+
+    def __init__(self):
+        self.text = ''
+        self.extractor = JsonStreamExtractor('{', stream_strings=True)
+
+    def feed(self, chunk: str) -> List[Tuple[str, Dict]]:
+        self.text += chunk
+        events: List[Tuple[str, Dict]] = []
+        while True:
+            for kind, key, value in self.extractor.feed(chunk):
+                if kind == 'member' and key in SCORE_FIELDS:
+                    try:
+                        events.append(("score", {key: clamp_score(value)}))
+                    except (TypeError, ValueError):
+                        pass
+                elif kind == 'delta' and key == 'feedback':
+                    events.append(("feedback", {"delta": value}))
+            if not self._rejected():
+                return events
+            self.extractor = JsonStreamExtractor('{', stream_strings=True, offset=self.extractor.end)
+            chunk = self.text
+
+    def _rejected(self) -> bool:
+        extractor = self.extractor
+        return extractor.done and not all(field in extractor.members for field in SCORE_FIELDS)
+
+    def result(self) -> ResponseAnalysis:
+        try:
+            return analysis_from_members(self.extractor.result())
+        except ParseError:
+            # Reparse the whole reply, for a wrapped, broken or near-JSON evaluation
+            return parse_analysis(self.text)
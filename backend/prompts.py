@@ -0,0 +1,50 @@
+from typing import Dict, List, Optional, Tuple
+
+# Bump whenever the evaluation prompt changes so cached results are invalidated
+EVALUATION_PROMPT_VERSION = "2"
+
+# Every interview covers these topics, one question each, in this order
+QUESTION_TOPICS = ('System Design', 'API Development', 'Database Management', 'Security', 'Problem Solving')
+
+QUESTION_SYSTEM_PROMPT = "You are an expert technical interviewer for backend developer positions. Generate challenging but fair questions that assess both theoretical knowledge and practical experience."
+
+QUESTION_MESSAGES = [
+    {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
+    {"role": "user", "content": f"Generate {len(QUESTION_TOPICS)} technical interview questions for a backend developer position, focusing on {', '.join(QUESTION_TOPICS[:-1])}, and {QUESTION_TOPICS[-1]}. Ask one question per topic, in that order. Return only a JSON array of question strings without any additional formatting or explanation."}
+]
+
+
+def build_topic_question_messages(topic: str, count: int, avoid: List[str]) -> List[Dict[str, str]]:
+    # Recent questions are listed so the model does not propose them again
+    avoided = "\n".join(f"- {question}" for question in avoid)
+    avoid_request = f" Do not repeat or rephrase any of these existing questions:\n{avoided}\n" if avoid else " "
+    return [
+        {"role": "system", "content": QUESTION_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Generate {count} distinct technical interview questions for a backend developer position about {topic}.{avoid_request}Return only a JSON array of question strings without any additional formatting or explanation."}
+    ]
+
+
+EVALUATION_SYSTEM_PROMPT = "You are an expert technical interviewer evaluating a backend developer candidate's response. Provide constructive feedback that highlights both strengths and areas for improvement."
+
+
+def build_evaluation_messages(text: str, question: Optional[str] = None) -> List[Dict[str, str]]:
+    if question:
+        evaluation_request = f"Evaluate this response to the following backend development question.\nQuestion: {question}\nResponse: {text}"
+    else:
+        evaluation_request = f"Evaluate this response to a backend development question:\n{text}"
+
+    return [
+        {"role": "system", "content": EVALUATION_SYSTEM_PROMPT},
+        {"role": "user", "content": f"{evaluation_request}\n\nProvide evaluation in JSON format with keys: technical_score (0-10), communication_score (0-10), and feedback (string)"}
+    ]
+
+
+def build_batch_evaluation_messages(answers: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+    # One system prompt for the whole interview instead of one per answer
+    numbered = "\n\n".join(
+        f"Answer {i}\nQuestion: {question}\nResponse: {text}" for i, (question, text) in enumerate(answers, 1)
+    )
+    return [
+        {"role": "system", "content": EVALUATION_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Evaluate each of these {len(answers)} responses to backend development questions independently.\n\n{numbered}\n\nProvide the evaluations as a JSON array with exactly {len(answers)} objects in the same order, each with keys: technical_score (0-10), communication_score (0-10), and feedback (string)"}
+    ]
@@ -0,0 +1,357 @@
+"""Persistent, de-duplicated bank of interview questions.
+
+Every generated question is stored with its topic. A hashed TF-IDF index
+in NumPy rejects near-duplicates on insert and assembles topic-balanced,
+diverse interview sets without calling the model. Top the bank up offline
+from the repository root::
+
+    python -m backend.question_bank --per-topic 40 --batch 10
+
+Questions are generated per topic until every topic has ``--per-topic``
+distinct questions. Running the command again adds more, and serving
+workers pick the new questions up without a restart.
+"""
+import argparse
+import asyncio
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from .llm import chat_completion, close_client
+from .metrics import QUESTION_BANK_INSERTS
+from .parsing import ParseError, parse_questions
+from .prompts import QUESTION_TOPICS, build_topic_question_messages
+from .scheduler import PRIORITY_BACKGROUND, LLMUnavailableError
+
+load_dotenv()
+
+# Question bank settings, tunable from the environment
+QUESTION_BANK_PATH = os.getenv('QUESTION_BANK_PATH', 'question_bank.sqlite3')
+QUESTION_BANK_DIMENSIONS = int(os.getenv('QUESTION_BANK_DIMENSIONS', '4096'))
+QUESTION_BANK_DUPLICATE_THRESHOLD = float(os.getenv('QUESTION_BANK_DUPLICATE_THRESHOLD', '0.6'))
+QUESTION_BANK_MIN_PER_TOPIC = int(os.getenv('QUESTION_BANK_MIN_PER_TOPIC', '10'))
+QUESTION_BANK_SYNC_INTERVAL = float(os.getenv('QUESTION_BANK_SYNC_INTERVAL', '30'))
+QUESTION_BANK_BUSY_TIMEOUT = float(os.getenv('QUESTION_BANK_BUSY_TIMEOUT', '5'))
+
+# Words that appear in questions on any subject, so they say nothing about similarity
+STOP_WORDS = frozenset((
+    'a an and are as at be between by can could describe do does explain for from how i if in is it its '
+    'of on or should that the their this to use used using was we what when where which while who why '
+    'will with would you your'
+).split())
+
+# Inflections stripped so that, say, "handles" and "handling" count as the same term
+SUFFIXES = ('ing', 'ers', 'er', 'es', 'ed', 'ly', 's')
+
+# Questions accepted by one add call are folded into the index in chunks of this size
+_ADD_CHUNK = 256
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    for suffix in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            break
+    return word[:6]
+
+
+def hashed_terms(text: str, dimensions: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the hashed buckets of a question's word stems, with sublinear term frequencies."""
+    terms = [stem(word) for word in _WORD.findall(text.lower()) if word not in STOP_WORDS]
+    # crc32 is stable across processes, unlike hash(), so every worker builds the same index
+    buckets, counts = np.unique(
+        np.array([zlib.crc32(term.encode('utf-8')) % dimensions for term in terms], dtype=np.int64),
+        return_counts=True
+    )
+    return buckets, (1 + np.log(counts)).astype(np.float32)
+
+
+class QuestionBank:
+    """Interview questions by topic in SQLite, with an in-memory similarity index.
+
+    Each question is a sparse vector of hashed word-stem counts, weighted
+    by inverse document frequency over the bank. All vectors sit in
+    one CSR-style array, so a question is compared with the whole bank in a
+    few vectorized NumPy operations. A question whose cosine similarity to
+    a banked one reaches ``duplicate_threshold`` is rejected. Sets prefer
+    the least-served questions, so they rotate across candidates, and among
+    those the ones least similar to questions already picked. Rows written
+    by other workers or the top-up command are loaded every
+    ``sync_interval`` seconds.
+    """
+
+    def __init__(self, path: Optional[str] = QUESTION_BANK_PATH, dimensions: int = QUESTION_BANK_DIMENSIONS,
+                 duplicate_threshold: float = QUESTION_BANK_DUPLICATE_THRESHOLD,
+                 min_per_topic: int = QUESTION_BANK_MIN_PER_TOPIC, sync_interval: float = QUESTION_BANK_SYNC_INTERVAL,
+                 busy_timeout: float = QUESTION_BANK_BUSY_TIMEOUT, seed: Optional[int] = None):
+        self.dimensions = dimensions
+        self.duplicate_threshold = duplicate_threshold
+        self.min_per_topic = max(1, min_per_topic)
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._rng = np.random.default_rng(seed)
+
+        # An empty path keeps the bank in memory, which only suits a single worker
+        self._db = sqlite3.connect(path or ':memory:', timeout=busy_timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS questions ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, question TEXT NOT NULL, "
+            "uses INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+        )
+        self._db.commit()
+
+        self._ids: List[int] = []
+        self._questions: List[str] = []
+        self._topics: List[int] = []
+        self._uses: List[int] = []
+        self._terms: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._topic_counts = [0] * len(QUESTION_TOPICS)
+        self._document_frequency = np.zeros(dimensions, dtype=np.int64)
+        self._index: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]] = None
+        self._last_id = 0
+        self._synced_at = 0.0
+        self.sync()
+
+    def sync(self) -> int:
+        """Load questions added elsewhere since the last sync and return how many there were."""
+        with self._lock:
+            return self._sync()
+
+    def _sync(self) -> int:
+        rows = self._db.execute(
+            "SELECT id, topic, question, uses FROM questions WHERE id > ? ORDER BY id", (self._last_id,)
+        ).fetchall()
+        for question_id, topic, question, uses in rows:
+            self._append(question_id, topic, question, uses)
+        self._synced_at = time.monotonic()
+        return len(rows)
+
+    def _sync_if_due(self) -> None:
+        if time.monotonic() - self._synced_at >= self.sync_interval:
+            self._sync()
+
+    def _append(self, question_id: int, topic: str, question: str, uses: int) -> None:
+        buckets, frequencies = hashed_terms(question, self.dimensions)
+        self._last_id = max(self._last_id, question_id)
+        if not len(buckets):
+            # Rows without a single term cannot be compared; add() never writes them
+            return
+        # Questions of a topic that was since dropped stay in the index but are never served
+        topic_index = QUESTION_TOPICS.index(topic) if topic in QUESTION_TOPICS else -1
+        self._ids.append(question_id)
+        self._questions.append(question)
+        self._topics.append(topic_index)
+        self._uses.append(uses)
+        self._terms.append((buckets, frequencies))
+        if topic_index >= 0:
+            self._topic_counts[topic_index] += 1
+        self._document_frequency[buckets] += 1
+        self._index = None
+
+    def _build_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Return ``(idf, buckets, weights, row_starts)`` with every row scaled to unit length."""
+        if self._index is None:
+            idf = (np.log((1 + len(self._terms)) / (1 + self._document_frequency)) + 1).astype(np.float32)
+            lengths = np.array([len(buckets) for buckets, _ in self._terms], dtype=np.int64)
+            if self._terms:
+                buckets = np.concatenate([buckets for buckets, _ in self._terms])
+                weights = np.concatenate([frequencies for _, frequencies in self._terms]) * idf[buckets]
+            else:
+                buckets, weights = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+            row_starts = np.zeros(len(lengths), dtype=np.int64)
+            row_starts[1:] = np.cumsum(lengths)[:-1]
+            # Every banked question has at least one term, so no row is empty
+            norms = np.sqrt(np.add.reduceat(weights ** 2, row_starts)) if self._terms else weights
+            self._index = (idf, buckets, weights / np.repeat(norms, lengths), row_starts)
+        return self._index
+
+    def _query(self, buckets: np.ndarray, frequencies: np.ndarray) -> np.ndarray:
+        """Return a question's terms as a dense unit vector weighted like the index."""
+        idf = self._build_index()[0]
+        query = np.zeros(self.dimensions, dtype=np.float32)
+        query[buckets] = frequencies * idf[buckets]
+        return query / np.linalg.norm(query)
+
+    def _similarities(self, query: np.ndarray) -> np.ndarray:
+        """Cosine similarity of a unit query vector to every banked question."""
+        _, buckets, weights, row_starts = self._build_index()
+        if not len(row_starts):
+            return np.zeros(0, dtype=np.float32)
+        return np.add.reduceat(weights * query[buckets], row_starts)
+
+    def add(self, questions: Iterable[Tuple[str, str]]) -> int:
+        """Store ``(topic, question)`` pairs that are not near-duplicates and return how many were added."""
+        added = 0
+        with self._lock:
+            # Hold the write lock while checking, so two writers cannot both add the same question
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._sync()
+                # Accepted questions are checked as a dense block until they join the index,
+                # so a large batch does not rebuild the index once per question
+                recent = np.zeros((_ADD_CHUNK, self.dimensions), dtype=np.float32)
+                recent_rows: List[Tuple[int, str, str, int]] = []
+                for topic, question in questions:
+                    question = question.strip()
+                    buckets, frequencies = hashed_terms(question, self.dimensions)
+                    if topic not in QUESTION_TOPICS or not len(buckets):
+                        continue
+                    query = self._query(buckets, frequencies)
+                    similarity = max(
+                        self._similarities(query).max(initial=0), (recent[:len(recent_rows)] @ query).max(initial=0)
+                    )
+                    if similarity >= self.duplicate_threshold:
+                        QUESTION_BANK_INSERTS.inc(outcome='duplicate')
+                        continue
+                    cursor = self._db.execute(
+                        "INSERT INTO questions (topic, question, uses, created_at) VALUES (?, ?, 0, ?)",
+                        (topic, question, time.time())
+                    )
+                    recent[len(recent_rows)] = query
+                    recent_rows.append((cursor.lastrowid, topic, question, 0))
+                    QUESTION_BANK_INSERTS.inc(outcome='added')
+                    added += 1
+                    if len(recent_rows) == _ADD_CHUNK:
+                        for row in recent_rows:
+                            self._append(*row)
+                        recent_rows = []
+                for row in recent_rows:
+                    self._append(*row)
+                self._db.commit()
+            except BaseException:
+                self._db.rollback()
+                raise
+        return added
+
+    def select(self, per_topic: int = 1, topics: Sequence[str] = QUESTION_TOPICS) -> List[str]:
+        """Return an interview set of ``per_topic`` questions from each of ``topics``, in topic order."""
+        with self._lock:
+            self._sync_if_due()
+            topic_of = np.array(self._topics, dtype=np.int64)
+            uses = np.array(self._uses, dtype=np.float64)
+            # Highest similarity of each banked question to any question picked so far
+            closest = np.zeros(len(uses))
+            picked: List[int] = []
+            for topic in topics:
+                candidates = np.flatnonzero(topic_of == QUESTION_TOPICS.index(topic))
+                for _ in range(per_topic):
+                    candidates = candidates[~np.isin(candidates, picked)]
+                    if not candidates.size:
+                        break
+                    # Fewer uses always wins; similarity breaks ties, and a little noise varies equal sets
+                    score = uses[candidates] + closest[candidates] + self._rng.random(candidates.size) * 0.01
+                    choice = int(candidates[np.argmin(score)])
+                    picked.append(choice)
+                    closest = np.maximum(closest, self._similarities(self._query(*self._terms[choice])))
+
+            for i in picked:
+                self._uses[i] += 1
+            self._db.executemany("UPDATE questions SET uses = uses + 1 WHERE id = ?", [(self._ids[i],) for i in picked])
+            self._db.commit()
+            return [self._questions[i] for i in picked]
+
+    def ready(self) -> bool:
+        """Whether every topic has enough questions for sets to vary between candidates."""
+        with self._lock:
+            self._sync_if_due()
+            return min(self._topic_counts) >= self.min_per_topic
+
+    def count(self, topic: str) -> int:
+        with self._lock:
+            return self._topic_counts[QUESTION_TOPICS.index(topic)]
+
+    def recent(self, topic: str, limit: int) -> List[str]:
+        """Return up to ``limit`` of the newest questions on ``topic``."""
+        topic_index = QUESTION_TOPICS.index(topic)
+        with self._lock:
+            matching = [question for question, t in zip(self._questions, self._topics) if t == topic_index]
+        return matching[-limit:] if limit > 0 else []
+
+    def stats(self) -> Dict:
+        with self._lock:
+            self._sync_if_due()
+            return {
+                'questions': len(self._ids),
+                'topics': dict(zip(QUESTION_TOPICS, self._topic_counts)),
+                'ready': min(self._topic_counts) >= self.min_per_topic,
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+async def top_up_topic(bank: QuestionBank, topic: str, target: int, batch: int, max_stale_rounds: int) -> int:
+    """Generate questions on ``topic`` until the bank holds ``target`` of them and return how many were added."""
+    added = 0
+    stale_rounds = 0
+    while bank.count(topic) < target and stale_rounds < max_stale_rounds:
+        count = min(batch, target - bank.count(topic))
+        messages = build_topic_question_messages(topic, count, bank.recent(topic, 20))
+        completion = await chat_completion(priority=PRIORITY_BACKGROUND, messages=messages)
+        try:
+            questions = parse_questions(completion.choices[0].message.content)
+        except ParseError as e:
+            print(f"Could not parse generated {topic} questions: {e}", file=sys.stderr)
+            stale_rounds += 1
+            continue
+        new = await asyncio.to_thread(bank.add, [(topic, question) for question in questions])
+        added += new
+        # Rounds that only produce duplicates mean the model has run out of ideas for this topic
+        stale_rounds = 0 if new else stale_rounds + 1
+        print(f"{topic}: +{new}, {bank.count(topic)}/{target}", file=sys.stderr)
+    return added
+
+
+async def top_up(bank: QuestionBank, topics: Sequence[str], target: int, batch: int, max_stale_rounds: int) -> int:
+    try:
+        added = await asyncio.gather(*(top_up_topic(bank, topic, target, batch, max_stale_rounds) for topic in topics))
+    finally:
+        await close_client()
+    return sum(added)
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Top up the interview question bank with newly generated questions.")
+    parser.add_argument('--per-topic', type=int, default=4 * QUESTION_BANK_MIN_PER_TOPIC, help="Questions to hold per topic")
+    parser.add_argument('--batch', type=int, default=10, help="Questions requested per model call")
+    parser.add_argument('--max-stale-rounds', type=int, default=3, help="Calls in a row without a new question before a topic is given up")
+    parser.add_argument('--topics', default=','.join(QUESTION_TOPICS), help="Comma-separated subset of: " + ', '.join(QUESTION_TOPICS))
+    parser.add_argument('--path', default=QUESTION_BANK_PATH, help="Question bank database")
+    args = parser.parse_args(argv)
+
+    topics = [topic.strip() for topic in args.topics.split(',') if topic.strip()]
+    unknown = [topic for topic in topics if topic not in QUESTION_TOPICS]
+    if unknown:
+        parser.error(f"unknown topics: {', '.join(unknown)}")
+
+    bank = QuestionBank(args.path)
+    try:
+        added = asyncio.run(top_up(bank, topics, args.per_topic, max(1, args.batch), max(1, args.max_stale_rounds)))
+    except LLMUnavailableError as e:
+        print(f"Stopped: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("\nInterrupted; questions added so far are kept.", file=sys.stderr)
+        return 130
+    finally:
+        stats = bank.stats()
+        bank.close()
+    print(f"Done: {added} questions added; bank holds {stats['questions']} ({stats['topics']})", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
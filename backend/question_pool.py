@@ -0,0 +1,165 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .metrics import detach_from_request
+from .scheduler import PRIORITY_BACKGROUND
+
+load_dotenv()
+
+# Question pool settings, tunable from the environment
+QUESTION_POOL_SIZE = int(os.getenv('QUESTION_POOL_SIZE', '10'))
+QUESTION_POOL_LOW_WATER = int(os.getenv('QUESTION_POOL_LOW_WATER', '3'))
+QUESTION_POOL_TTL = float(os.getenv('QUESTION_POOL_TTL', '86400'))
+QUESTION_POOL_MAX_USES = int(os.getenv('QUESTION_POOL_MAX_USES', '1'))
+QUESTION_POOL_REFILL_CONCURRENCY = int(os.getenv('QUESTION_POOL_REFILL_CONCURRENCY', '2'))
+QUESTION_POOL_PATH = os.getenv('QUESTION_POOL_PATH', 'question_pool.sqlite3')
+QUESTION_POOL_BUSY_TIMEOUT = float(os.getenv('QUESTION_POOL_BUSY_TIMEOUT', '5'))
+
+
+class QuestionPool:
+    """Warm store of pre-generated question sets, shared by every worker.
+
+    Sets live in a SQLite table, so all ``uvicorn`` workers draw from one
+    pool. ``take`` claims the least-used set in a single write transaction,
+    so a set is served at most ``max_uses`` times however many workers there
+    are. Once the pool drops below ``low_water``, a background refill starts.
+    Refills call ``generate`` at background priority so they never delay
+    live evaluations. A set is evicted after ``max_uses`` interviews or
+    ``ttl`` seconds, whichever comes first, so candidates keep seeing fresh
+    questions. Database calls run in a thread, because they may wait on
+    another worker's lock.
+    """
+
+    def __init__(self, generate: Callable[..., Awaitable[List[str]]], size: int = QUESTION_POOL_SIZE,
+                 low_water: int = QUESTION_POOL_LOW_WATER, ttl: float = QUESTION_POOL_TTL,
+                 max_uses: int = QUESTION_POOL_MAX_USES, path: Optional[str] = QUESTION_POOL_PATH,
+                 refill_concurrency: int = QUESTION_POOL_REFILL_CONCURRENCY,
+                 busy_timeout: float = QUESTION_POOL_BUSY_TIMEOUT):
+        self.generate = generate
+        self.size = max(1, size)
+        self.low_water = min(low_water, self.size)
+        self.ttl = ttl
+        self.max_uses = max(1, max_uses)
+        self.path = path
+        self.refill_concurrency = max(1, refill_concurrency)
+        self.busy_timeout = busy_timeout
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._refill_task: Optional[asyncio.Task] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened on first use, so importing the service touches no files
+        if self._db is None:
+            # An empty path keeps the pool in memory, which only suits a single worker
+            self._db = sqlite3.connect(self.path or ':memory:', timeout=self.busy_timeout, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS question_sets ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, questions TEXT NOT NULL, "
+                "uses INTEGER NOT NULL DEFAULT 0, created_at REAL NOT NULL)"
+            )
+            self._db.commit()
+        return self._db
+
+    def count(self) -> int:
+        """Return how many unexpired sets are ready."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT COUNT(*) FROM question_sets WHERE created_at >= ?", (time.time() - self.ttl,)
+            ).fetchone()[0]
+
+    def add(self, question_sets: List[List[str]]) -> None:
+        now = time.time()
+        with self._lock:
+            db = self._connect()
+            db.executemany(
+                "INSERT INTO question_sets (questions, uses, created_at) VALUES (?, 0, ?)",
+                [(json.dumps(questions), now) for questions in question_sets]
+            )
+            db.commit()
+
+    def claim(self) -> Tuple[Optional[List[str]], int]:
+        """Use the least-used set once and return it with the number of sets left."""
+        with self._lock:
+            db = self._connect()
+            # Hold the write lock from read to update, so two workers never claim the same last use
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute("DELETE FROM question_sets WHERE created_at < ?", (time.time() - self.ttl,))
+                # Fewer uses first spreads reuse evenly; the oldest set wins a tie
+                row = db.execute("SELECT id, questions, uses FROM question_sets ORDER BY uses, id LIMIT 1").fetchone()
+                questions = None
+                if row is not None:
+                    set_id, questions, uses = row
+                    questions = json.loads(questions)
+                    if uses + 1 >= self.max_uses:
+                        db.execute("DELETE FROM question_sets WHERE id = ?", (set_id,))
+                    else:
+                        db.execute("UPDATE question_sets SET uses = uses + 1 WHERE id = ?", (set_id,))
+                remaining = db.execute("SELECT COUNT(*) FROM question_sets").fetchone()[0]
+                db.commit()
+            except BaseException:
+                db.rollback()
+                raise
+        return questions, remaining
+
+    def start(self) -> None:
+        """Begin filling the pool in the background."""
+        self.schedule_refill()
+
+    async def stop(self) -> None:
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+            try:
+                await self._refill_task
+            except asyncio.CancelledError:
+                pass
+            self._refill_task = None
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def schedule_refill(self, remaining: Optional[int] = None) -> None:
+        """Start a refill unless one is running; ``remaining`` below ``low_water`` or unknown triggers it."""
+        if self._refill_task is not None and not self._refill_task.done():
+            return
+        if remaining is None or remaining < self.low_water:
+            self._refill_task = asyncio.create_task(self._refill())
+
+    async def _refill(self) -> None:
+        detach_from_request()
+        try:
+            while (missing := self.size - await asyncio.to_thread(self.count)) > 0:
+                results = await asyncio.gather(
+                    *(self.generate(priority=PRIORITY_BACKGROUND) for _ in range(min(missing, self.refill_concurrency))),
+                    return_exceptions=True
+                )
+                question_sets = [questions for questions in results if isinstance(questions, list) and questions]
+                if not question_sets:
+                    # Upstream is failing; try again on the next take instead of spinning
+                    break
+                await asyncio.to_thread(self.add, question_sets)
+        except sqlite3.Error as e:
+            print(f"Error refilling question pool: {e}")
+
+    async def take(self) -> List[str]:
+        """Return a question set, generating one inline only if the pool is empty."""
+        try:
+            questions, remaining = await asyncio.to_thread(self.claim)
+        except sqlite3.Error as e:
+            print(f"Error reading question pool: {e}")
+            questions, remaining = None, None
+        if questions is None:
+            questions = await self.generate()
+
+        self.schedule_refill(remaining)
+        return questions
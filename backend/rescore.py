@@ -0,0 +1,218 @@
+"""Re-score archived answers offline.
+
+Reads a JSONL file of ``{"question": ..., "text": ...}`` records (other
+fields are passed through) and writes each record with a fresh
+``analysis``, or an ``error``, to an output JSONL file in input order::
+
+    python -m backend.rescore answers.jsonl rescored.jsonl --concurrency 16 --model gpt-4o-mini
+
+Progress is checkpointed next to the output file. Running the same
+command again after a crash or Ctrl-C resumes where it stopped; delete
+the checkpoint to start over.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .llm import chat_completion, close_client
+from .parsing import ParseError, parse_analysis
+from .prompts import EVALUATION_PROMPT_VERSION, build_evaluation_messages
+from .scheduler import PRIORITY_BACKGROUND, LLMUnavailableError
+
+load_dotenv()
+
+# Re-scoring settings, tunable from the environment
+RESCORE_CONCURRENCY = int(os.getenv('RESCORE_CONCURRENCY', '8'))
+RESCORE_CHECKPOINT_EVERY = int(os.getenv('RESCORE_CHECKPOINT_EVERY', '100'))
+RESCORE_MAX_ATTEMPTS = int(os.getenv('RESCORE_MAX_ATTEMPTS', '5'))
+
+
+def load_checkpoint(path: str) -> Tuple[int, int]:
+    """Return ``(lines_done, output_bytes)`` from a checkpoint file, or zeros if there is none."""
+    if not os.path.exists(path):
+        return 0, 0
+    with open(path, 'r') as f:
+        checkpoint = json.load(f)
+    return checkpoint['lines_done'], checkpoint['output_bytes']
+
+
+def save_checkpoint(path: str, lines_done: int, output_bytes: int) -> None:
+    # Write to a temporary file first so a crash never leaves a truncated checkpoint
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump({'lines_done': lines_done, 'output_bytes': output_bytes}, f)
+    os.replace(tmp_path, path)
+
+
+async def score_record(line: str, max_attempts: int) -> Dict:
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return {'error': f"invalid JSON: {e}", 'raw': line.rstrip('\n')}
+    if not isinstance(record, dict) or not isinstance(record.get('text'), str):
+        return {'error': "record has no 'text' field", 'raw': line.rstrip('\n')}
+    if not record['text'].strip():
+        return {**record, 'error': "empty answer"}
+
+    messages = build_evaluation_messages(record['text'], record.get('question'))
+    for attempt in range(1, max_attempts + 1):
+        try:
+            completion = await chat_completion(messages=messages, priority=PRIORITY_BACKGROUND)
+            analysis = parse_analysis(completion.choices[0].message.content)
+            return {
+                **record,
+                'analysis': dict(analysis),
+                'model': os.getenv('GPT_MODEL'),
+                'prompt_version': EVALUATION_PROMPT_VERSION,
+            }
+        except ParseError as e:
+            error = f"unparseable evaluation: {e}"
+        except LLMUnavailableError as e:
+            # The scheduler has already retried; wait out the outage before trying again
+            error = str(e)
+            if attempt < max_attempts:
+                await asyncio.sleep(e.retry_after)
+        except Exception as e:
+            error = str(e)
+    return {**record, 'error': error}
+
+
+class Progress:
+    """Prints throughput and an ETA to stderr at most once per ``interval`` seconds."""
+
+    def __init__(self, total: int, already_done: int, interval: float = 2.0):
+        self.total = total
+        self.done = already_done
+        self.errors = 0
+        self.interval = interval
+        self._started = time.monotonic()
+        self._start_done = already_done
+        self._last_report = 0.0
+
+    def update(self, failed: bool) -> None:
+        self.done += 1
+        self.errors += failed
+        now = time.monotonic()
+        if now - self._last_report >= self.interval or self.done == self.total:
+            self._last_report = now
+            self.report()
+
+    def report(self) -> None:
+        elapsed = max(time.monotonic() - self._started, 1e-9)
+        rate = (self.done - self._start_done) / elapsed
+        eta = (self.total - self.done) / rate if rate else float('inf')
+        print(
+            f"\r{self.done}/{self.total} records, {self.errors} errors, {rate:.1f} rec/s, ETA {eta:.0f}s ",
+            end='', file=sys.stderr, flush=True
+        )
+
+
+async def rescore(input_path: str, output_path: str, checkpoint_path: Optional[str] = None,
+                  concurrency: int = RESCORE_CONCURRENCY, checkpoint_every: int = RESCORE_CHECKPOINT_EVERY,
+                  max_attempts: int = RESCORE_MAX_ATTEMPTS) -> Progress:
+    """Re-score ``input_path`` into ``output_path``, resuming from the checkpoint if there is one.
+
+    At most ``4 * concurrency`` records are held in memory at once: a record
+    is only read once the output has caught up to within that window, so
+    memory stays flat however large the input is. Results are written in
+    input order. The checkpoint records how many input lines are fully
+    written and the matching output size. On resume, the output is cut
+    back to that size and any lines after it are scored again.
+    """
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    lines_done, output_bytes = load_checkpoint(checkpoint_path)
+    with open(input_path, 'rb') as f:
+        total = sum(1 for _ in f)
+
+    concurrency = max(1, concurrency)
+    checkpoint_every = max(1, checkpoint_every)
+    max_attempts = max(1, max_attempts)
+    window = asyncio.Semaphore(concurrency * 4)
+    slots = asyncio.Semaphore(concurrency)
+    finished: Dict[int, Dict] = {}
+    progress = Progress(total, lines_done)
+    next_to_write = lines_done
+    tasks = set()
+
+    async def score(index: int, line: str) -> None:
+        async with slots:
+            finished[index] = await score_record(line, max_attempts)
+        write_ready()
+
+    def write_ready() -> None:
+        nonlocal next_to_write
+        while next_to_write in finished:
+            result = finished.pop(next_to_write)
+            output.write((json.dumps(result) + '\n').encode('utf-8'))
+            next_to_write += 1
+            progress.update('error' in result)
+            window.release()
+            if next_to_write % checkpoint_every == 0:
+                checkpoint()
+
+    def checkpoint() -> None:
+        output.flush()
+        os.fsync(output.fileno())
+        save_checkpoint(checkpoint_path, next_to_write, output.tell())
+
+    mode = 'r+b' if lines_done and os.path.exists(output_path) else 'wb'
+    with open(output_path, mode) as output, open(input_path, 'r', encoding='utf-8') as source:
+        # Drop anything written after the last checkpoint; those lines are scored again
+        output.truncate(output_bytes if mode == 'r+b' else 0)
+        output.seek(0, os.SEEK_END)
+        try:
+            for index, line in enumerate(source):
+                if index < lines_done:
+                    continue
+                await window.acquire()
+                task = asyncio.create_task(score(index, line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            checkpoint()
+            await close_client()
+
+    print(file=sys.stderr)
+    return progress
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description="Re-score archived interview answers with the current prompt and model.")
+    parser.add_argument('input', help="JSONL file of {\"question\": ..., \"text\": ...} records")
+    parser.add_argument('output', help="JSONL file to write scored records to")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: OUTPUT.checkpoint)")
+    parser.add_argument('--concurrency', type=int, default=RESCORE_CONCURRENCY, help="Evaluations in flight at once")
+    parser.add_argument('--checkpoint-every', type=int, default=RESCORE_CHECKPOINT_EVERY, help="Records between checkpoints")
+    parser.add_argument('--max-attempts', type=int, default=RESCORE_MAX_ATTEMPTS, help="Attempts per record before recording an error")
+    parser.add_argument('--model', help="Model to score with (default: GPT_MODEL)")
+    args = parser.parse_args(argv)
+    for option in ('concurrency', 'checkpoint_every', 'max_attempts'):
+        if getattr(args, option) < 1:
+            parser.error(f"--{option.replace('_', '-')} must be at least 1")
+
+    if args.model:
+        os.environ['GPT_MODEL'] = args.model
+    print(f"Scoring with model {os.getenv('GPT_MODEL')} and prompt version {EVALUATION_PROMPT_VERSION}", file=sys.stderr)
+    try:
+        progress = asyncio.run(rescore(
+            args.input, args.output, args.checkpoint, args.concurrency, args.checkpoint_every, args.max_attempts
+        ))
+    except KeyboardInterrupt:
+        print("\nInterrupted; run the same command again to resume.", file=sys.stderr)
+        return 130
+    print(f"Done: {progress.done} records, {progress.errors} errors", file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
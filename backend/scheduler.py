@@ -0,0 +1,240 @@
+import asyncio
+import heapq
+import itertools
+import os
+import random
+import re
+import time
+from typing import Awaitable, Callable, List, Mapping, Optional, Tuple, TypeVar
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+T = TypeVar('T')
+
+# Lower values are dispatched first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+# Scheduler settings, tunable from the environment
+LLM_MAX_IN_FLIGHT = int(os.getenv('LLM_MAX_IN_FLIGHT', '32'))
+LLM_MIN_IN_FLIGHT = int(os.getenv('LLM_MIN_IN_FLIGHT', '1'))
+LLM_INITIAL_IN_FLIGHT = int(os.getenv('LLM_INITIAL_IN_FLIGHT', '8'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '4'))
+LLM_RETRY_BASE_DELAY = float(os.getenv('LLM_RETRY_BASE_DELAY', '0.5'))
+LLM_RETRY_MAX_DELAY = float(os.getenv('LLM_RETRY_MAX_DELAY', '20'))
+LLM_BREAKER_THRESHOLD = int(os.getenv('LLM_BREAKER_THRESHOLD', '5'))
+LLM_BREAKER_COOLDOWN = float(os.getenv('LLM_BREAKER_COOLDOWN', '30'))
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|s|m|h)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1.0, 'm': 60.0, 'h': 3600.0}
+
+
+def retryable_errors() -> Tuple[type, ...]:
+    """Return the OpenAI errors worth retrying, importing the SDK on first use."""
+    import openai
+
+    return (
+        openai.RateLimitError,
+        openai.APITimeoutError,
+        openai.APIConnectionError,
+        openai.InternalServerError,
+    )
+
+
+class LLMUnavailableError(Exception):
+    """Raised when the model cannot be reached: retries ran out or the circuit is open."""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse a rate-limit reset value such as ``"1s"``, ``"6m0s"``, ``"120ms"`` or ``"2"``."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+class LLMScheduler:
+    """Central admission control for chat-completion calls.
+
+    Callers wait in a priority queue, so live evaluations overtake
+    background question refills. The number of concurrent calls adapts
+    AIMD-style: it grows by one per window of successes and halves on a
+    429, and dispatch pauses when the rate-limit headers say the quota is
+    spent. Retryable failures are retried with jittered exponential
+    backoff. After ``breaker_threshold`` calls in a row have failed for
+    good, the circuit opens and new calls fail fast for
+    ``breaker_cooldown`` seconds.
+    """
+
+    def __init__(self, initial_limit: int = LLM_INITIAL_IN_FLIGHT, min_limit: int = LLM_MIN_IN_FLIGHT,
+                 max_limit: int = LLM_MAX_IN_FLIGHT, max_retries: int = LLM_MAX_RETRIES,
+                 base_delay: float = LLM_RETRY_BASE_DELAY, max_delay: float = LLM_RETRY_MAX_DELAY,
+                 breaker_threshold: int = LLM_BREAKER_THRESHOLD, breaker_cooldown: float = LLM_BREAKER_COOLDOWN):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_threshold = max(1, breaker_threshold)
+        self.breaker_cooldown = breaker_cooldown
+
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+        self._last_decrease = 0.0
+        self._consecutive_failures = 0
+        self._breaker_open_until = 0.0
+        self._half_open_trial = False
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    @property
+    def circuit_open(self) -> bool:
+        return time.monotonic() < self._breaker_open_until
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        if now < self._paused_until:
+            if self._wakeup is None:
+                loop = asyncio.get_running_loop()
+                self._wakeup = loop.call_later(self._paused_until - now, self._resume)
+            return
+        while self._waiters and self.in_flight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(None)
+
+    def _resume(self) -> None:
+        self._wakeup = None
+        self._dispatch()
+
+    async def _acquire(self, priority: int) -> None:
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._dispatch()
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was granted just as the caller gave up
+                self.release()
+            raise
+
+    def release(self) -> None:
+        """Free a slot held by a call made with ``hold_slot=True``."""
+        self.in_flight -= 1
+        self._dispatch()
+
+    def observe_headers(self, headers: Mapping[str, str]) -> None:
+        """Pause dispatch when the rate-limit headers say the quota is used up."""
+        for kind in ('requests', 'tokens'):
+            remaining = headers.get(f'x-ratelimit-remaining-{kind}')
+            if remaining is not None and remaining.isdigit() and int(remaining) == 0:
+                reset = parse_duration(headers.get(f'x-ratelimit-reset-{kind}'))
+                if reset:
+                    self._paused_until = max(self._paused_until, time.monotonic() + reset)
+
+    def _check_breaker(self) -> None:
+        now = time.monotonic()
+        if now < self._breaker_open_until:
+            raise LLMUnavailableError(
+                "The language model is temporarily unavailable. Please try again shortly.",
+                retry_after=self._breaker_open_until - now
+            )
+        if self._consecutive_failures >= self.breaker_threshold:
+            # Half-open: let a single trial call through
+            if self._half_open_trial:
+                raise LLMUnavailableError(
+                    "The language model is temporarily unavailable. Please try again shortly.",
+                    retry_after=1.0
+                )
+            self._half_open_trial = True
+
+    def _on_success(self) -> None:
+        self._consecutive_failures = 0
+        self._half_open_trial = False
+        # Additive increase: one extra slot per window of successful calls
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _on_rate_limited(self, error: Exception) -> Optional[float]:
+        now = time.monotonic()
+        # Multiplicative decrease, at most once per second so a burst of 429s counts once
+        if now - self._last_decrease > 1.0:
+            self.limit = max(float(self.min_limit), self.limit / 2)
+            self._last_decrease = now
+        retry_after = parse_duration(error.response.headers.get('retry-after')) if error.response is not None else None
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        return retry_after
+
+    def _on_final_failure(self) -> None:
+        self._consecutive_failures += 1
+        self._half_open_trial = False
+        if self._consecutive_failures >= self.breaker_threshold:
+            self._breaker_open_until = time.monotonic() + self.breaker_cooldown
+
+    def _backoff(self, attempt: int) -> float:
+        # Full jitter keeps retrying clients from synchronising
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    async def run(self, call: Callable[[], Awaitable[T]], priority: int = PRIORITY_INTERACTIVE,
+                  hold_slot: bool = False) -> T:
+        """Run ``call`` under admission control, retrying retryable failures.
+
+        With ``hold_slot`` the slot stays taken after a successful call and
+        the caller must ``release`` it, e.g. once a stream is consumed.
+        """
+        self._check_breaker()
+        attempt = 0
+        while True:
+            await self._acquire(priority)
+            try:
+                result = await call()
+            except retryable_errors() as e:
+                self.release()
+                retry_after = self._on_rate_limited(e) if getattr(e, 'status_code', None) == 429 else None
+                if attempt >= self.max_retries:
+                    self._on_final_failure()
+                    raise LLMUnavailableError(
+                        f"The language model did not respond after {attempt + 1} attempts: {e}",
+                        retry_after=retry_after or self.base_delay
+                    ) from e
+                await asyncio.sleep(max(retry_after or 0.0, self._backoff(attempt)))
+                attempt += 1
+                continue
+            except BaseException:
+                self.release()
+                self._half_open_trial = False
+                raise
+            self._on_success()
+            if not hold_slot:
+                self.release()
+            return result
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "circuit_open": self.circuit_open,
+            "consecutive_failures": self._consecutive_failures,
+        }
@@ -0,0 +1,489 @@
+import asyncio
+import os
+import sqlite3
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from .evaluation_cache import EvaluationCache
+from .llm import chat_completion, close_client, stream_chat_completion
+from .metrics import COALESCED_CALLS, ERRORS, FALLBACK_RESPONSES, PARSE_RESULTS, QUESTION_SETS_SERVED, timed
+from .models import BatchEvaluation, InterviewAnswer, InterviewVerdict, ResponseAnalysis
+from .parsing import AnalysisStreamParser, ParseError, parse_analyses, parse_analysis, parse_questions
+from .prompts import (EVALUATION_PROMPT_VERSION, QUESTION_MESSAGES, QUESTION_TOPICS, build_batch_evaluation_messages,
+                      build_evaluation_messages)
+from .question_pool import QuestionPool
+from .scheduler import PRIORITY_INTERACTIVE, LLMUnavailableError
+from .sessions import SessionStore
+from .singleflight import SingleFlight, flight_key
+from .transcription import (MAX_STREAM_SAMPLE_RATE, MIN_STREAM_SAMPLE_RATE, StreamingTranscription, get_pool,
+                            shutdown_pool)
+
+load_dotenv()
+
+# Whole-interview evaluation settings, tunable from the environment
+BATCH_EVALUATION_MODE = os.getenv('BATCH_EVALUATION_MODE', 'packed')
+BATCH_EVALUATION_CONCURRENCY = int(os.getenv('BATCH_EVALUATION_CONCURRENCY', '4'))
+BATCH_EVALUATION_MAX_ANSWERS = int(os.getenv('BATCH_EVALUATION_MAX_ANSWERS', '20'))
+INTERVIEW_PASS_THRESHOLD = float(os.getenv('INTERVIEW_PASS_THRESHOLD', '7.0'))
+
+# Serve interviews from the question bank once it covers every topic
+QUESTION_BANK_ENABLED = os.getenv('QUESTION_BANK_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Identical LLM work already in flight is shared instead of repeated
+llm_flight = SingleFlight()
+
+EMPTY_RESPONSE_ANALYSIS = ResponseAnalysis(
+    technical_score=0.0,
+    communication_score=0.0,
+    feedback="Please provide a response before submitting."
+)
+
+ERROR_RESPONSE_ANALYSIS = ResponseAnalysis(
+    technical_score=0.0,
+    communication_score=0.0,
+    feedback="An error occurred while analyzing your response. Please try again."
+)
+
+UNPARSEABLE_RESPONSE_ANALYSIS = ResponseAnalysis(
+    technical_score=0.0,
+    communication_score=0.0,
+    feedback="Could not analyze response format. Please try rephrasing your answer."
+)
+
+
+class InvalidRequest(ValueError):
+    """Raised when a request does not fit its session or the configured limits."""
+
+
+class QuestionsUnavailable(Exception):
+    """Raised when no interview questions could be generated."""
+
+
+class EvaluationUnavailable(Exception):
+    """Raised when none of an interview's answers could be scored."""
+
+
+def count_parse(target: str, text: Optional[str], ok: bool) -> None:
+    # "extracted" means the JSON had to be dug out of fences, prose or a truncated reply
+    stripped = (text or '').strip()
+    clean = stripped[:1] in ('{', '[') and stripped[-1:] in ('}', ']')
+    PARSE_RESULTS.inc(target=target, outcome=('clean' if clean else 'extracted') if ok else 'failed')
+
+
+def fallback(analysis: ResponseAnalysis, reason: str) -> ResponseAnalysis:
+    FALLBACK_RESPONSES.inc(reason=reason)
+    return analysis
+
+
+async def generate_questions(priority: int = PRIORITY_INTERACTIVE) -> List[str]:
+    if priority != PRIORITY_INTERACTIVE:
+        # Background refills want distinct sets, so they are never coalesced
+        return await request_questions(priority)
+
+    # Candidates arriving together while the pool is empty share one generation
+    key = flight_key('questions', os.getenv('GPT_MODEL'), QUESTION_MESSAGES)
+    if key in llm_flight:
+        COALESCED_CALLS.inc(target='questions')
+    return list(await llm_flight.run(key, lambda: request_questions(priority)))
+
+
+async def request_questions(priority: int) -> List[str]:
+    try:
+        with timed('llm'):
+            completion = await chat_completion(priority=priority, messages=QUESTION_MESSAGES)
+
+        # Parse the response, tolerating fenced or prose-wrapped arrays
+        response_text = completion.choices[0].message.content
+        try:
+            with timed('parse'):
+                questions = parse_questions(response_text)
+            count_parse('questions', response_text, True)
+        except ParseError as e:
+            count_parse('questions', response_text, False)
+            print(f"Could not parse generated questions: {e}")
+            # Fallback to empty list in case of parsing issues
+            return []
+        if QUESTION_BANK_ENABLED and len(questions) == len(QUESTION_TOPICS):
+            # Every generated question is kept; the prompt asks for one per topic in topic order
+            try:
+                await asyncio.to_thread(get_question_bank().add, zip(QUESTION_TOPICS, questions))
+            except Exception as e:
+                ERRORS.inc(stage='question_bank')
+                print(f"Error storing generated questions: {e}")
+        return questions
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        ERRORS.inc(stage='generate_questions')
+        print(f"Error generating questions: {e}")
+        # Return empty list in case of API issues
+        return []
+
+
+# Warm pool of question sets so a new interview does not wait on the LLM
+question_pool = QuestionPool(generate_questions)
+
+# Evaluations by answer, question, model and prompt version
+_evaluation_cache = None
+
+# Interview state lives here rather than in the frontend, so any worker can serve any session
+_session_store = None
+
+# Cohort statistics, folded in incrementally from the session response log
+_cohort_analytics = None
+
+# Stored, de-duplicated questions by topic; serving from it needs no model call
+_question_bank = None
+
+
+def get_evaluation_cache():
+    # Built on first use, so importing the service opens no database
+    global _evaluation_cache
+    if _evaluation_cache is None:
+        _evaluation_cache = EvaluationCache(EVALUATION_PROMPT_VERSION)
+    return _evaluation_cache
+
+
+def get_session_store():
+    global _session_store
+    if _session_store is None:
+        _session_store = SessionStore()
+    return _session_store
+
+
+def get_question_bank():
+    # Built on first use so workers import without NumPy
+    global _question_bank
+    if _question_bank is None:
+        from .question_bank import QuestionBank
+        _question_bank = QuestionBank()
+    return _question_bank
+
+
+def question_bank_ready() -> bool:
+    return QUESTION_BANK_ENABLED and get_question_bank().ready()
+
+
+def get_cohort_analytics():
+    # Built on the first analytics request so workers start without importing NumPy
+    global _cohort_analytics
+    if _cohort_analytics is None:
+        from .analytics import CohortAnalytics
+        _cohort_analytics = CohortAnalytics(get_session_store(), INTERVIEW_PASS_THRESHOLD)
+    return _cohort_analytics
+
+
+async def start() -> None:
+    # The LLM-backed pool is only needed until the bank covers every topic
+    if not await asyncio.to_thread(question_bank_ready):
+        question_pool.start()
+    # Opening the stores creates their tables and drops stale cache rows, so it runs in a thread
+    (await asyncio.to_thread(get_session_store)).start()
+    (await asyncio.to_thread(get_evaluation_cache)).start()
+
+
+async def stop() -> None:
+    # Release pooled upstream connections and transcription workers on shutdown
+    await question_pool.stop()
+    if _session_store is not None:
+        await _session_store.stop()
+    if _evaluation_cache is not None:
+        await _evaluation_cache.stop()
+    await close_client()
+    shutdown_pool()
+    if _evaluation_cache is not None:
+        _evaluation_cache.close()
+    if _session_store is not None:
+        _session_store.close()
+    if _question_bank is not None:
+        _question_bank.close()
+
+
+async def take_questions() -> List[str]:
+    # Both calls wait on the bank's lock, which an insert holds through a write transaction
+    if await asyncio.to_thread(question_bank_ready):
+        QUESTION_SETS_SERVED.inc(source='bank')
+        with timed('question_bank'):
+            return await asyncio.to_thread(get_question_bank().select)
+    QUESTION_SETS_SERVED.inc(source='pool')
+    with timed('question_pool'):
+        return await question_pool.take()
+
+
+async def create_session() -> Dict:
+    questions = await take_questions()
+    if not questions:
+        raise QuestionsUnavailable("Could not generate interview questions. Please try again.")
+    # Session writes and reads may wait on other workers' locks, so they run off the event loop
+    return await asyncio.to_thread(get_session_store().create, questions)
+
+
+async def get_session(session_id: str) -> Dict:
+    return await asyncio.to_thread(get_session_store().get, session_id)
+
+
+async def session_question(session_id: Optional[str], question_index: Optional[int],
+                           question: Optional[str]) -> Optional[str]:
+    """Return the question being answered, checking it against the session if one is given."""
+    if session_id is None:
+        return question
+    questions = await asyncio.to_thread(get_session_store().questions, session_id)
+    if question_index is None or not 0 <= question_index < len(questions):
+        raise InvalidRequest("question_index does not match a question in this session.")
+    return questions[question_index]
+
+
+async def record_response(session_id: Optional[str], question_index: Optional[int], question: Optional[str],
+                          text: str, analysis: ResponseAnalysis) -> None:
+    # Only real evaluations are logged, so a retry after an error is not shadowed by a 0/0 score
+    if session_id is None or analysis in (EMPTY_RESPONSE_ANALYSIS, ERROR_RESPONSE_ANALYSIS, UNPARSEABLE_RESPONSE_ANALYSIS):
+        return
+    # Waiting for the commit means a reload on any worker already sees this answer
+    try:
+        await get_session_store().record(session_id, question_index, question, text, dict(analysis))
+    except sqlite3.Error as e:
+        ERRORS.inc(stage='session_log')
+        print(f"Error recording interview response: {e}")
+
+
+async def transcribe(audio_content: bytes) -> str:
+    return await get_pool().transcribe(audio_content)
+
+
+def transcription_stream(sample_rate: int,
+                         on_segment: Optional[Callable[[int, str], Awaitable[None]]] = None) -> StreamingTranscription:
+    # Clients send the rate as JSON, so reject anything that is not a whole number of Hz in range
+    number = isinstance(sample_rate, (int, float)) and not isinstance(sample_rate, bool)
+    if not (number and MIN_STREAM_SAMPLE_RATE <= sample_rate <= MAX_STREAM_SAMPLE_RATE and sample_rate == int(sample_rate)):
+        raise InvalidRequest(
+            f"sample_rate must be a whole number of Hz between {MIN_STREAM_SAMPLE_RATE} and {MAX_STREAM_SAMPLE_RATE}."
+        )
+    return StreamingTranscription(get_pool(), int(sample_rate), on_segment)
+
+
+async def evaluate_response(text: str, question: Optional[str] = None) -> ResponseAnalysis:
+    if not text.strip():
+        return fallback(EMPTY_RESPONSE_ANALYSIS, 'empty')
+
+    # Identical submissions are answered from the cache without an LLM call
+    with timed('cache_lookup'):
+        cache = get_evaluation_cache()
+        cache_key = cache.make_key(text, question, os.getenv('GPT_MODEL'))
+        cached = await cache.get(cache_key)
+    if cached is not None:
+        return ResponseAnalysis(**cached)
+
+    # A double-submitted answer waits for the evaluation already running
+    if cache_key in llm_flight:
+        COALESCED_CALLS.inc(target='analysis')
+    try:
+        return await llm_flight.run(cache_key, lambda: request_evaluation(text, question, cache_key))
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        # Only a shared streamed evaluation can fail here; request_evaluation handles its own errors
+        ERRORS.inc(stage='evaluate')
+        print(f"Error in shared evaluation: {str(e)}")
+        return fallback(ERROR_RESPONSE_ANALYSIS, 'error')
+
+
+async def request_evaluation(text: str, question: Optional[str], cache_key: str) -> ResponseAnalysis:
+    try:
+        with timed('llm'):
+            completion = await chat_completion(messages=build_evaluation_messages(text, question))
+
+        response_text = completion.choices[0].message.content
+        try:
+            with timed('parse'):
+                result = parse_analysis(response_text)
+        except ParseError as e:
+            count_parse('analysis', response_text, False)
+            print(f"Could not parse evaluation: {e}")
+            return fallback(UNPARSEABLE_RESPONSE_ANALYSIS, 'unparseable')
+        count_parse('analysis', response_text, True)
+        get_evaluation_cache().put(cache_key, dict(result))
+        return result
+    except LLMUnavailableError:
+        # Fail fast instead of recording a misleading 0/0 score
+        raise
+    except Exception as e:
+        ERRORS.inc(stage='evaluate')
+        print(f"Error in analyze_response: {str(e)}")
+        return fallback(ERROR_RESPONSE_ANALYSIS, 'error')
+
+
+async def evaluate_answer(text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> ResponseAnalysis:
+    """Evaluate an answer to an already resolved question and record it in its session."""
+    analysis = await evaluate_response(text, question)
+    await record_response(session_id, question_index, question, text, analysis)
+    return analysis
+
+
+async def stream_evaluation(text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                            question_index: Optional[int] = None) -> AsyncIterator[Tuple[str, Dict]]:
+    """Yield ``(event, data)`` pairs for an evaluation as the model produces it.
+
+    ``score`` events carry each score as soon as it can be parsed,
+    ``feedback`` events carry new feedback text, and a final ``result``
+    event carries the complete, validated ResponseAnalysis. If the model is
+    unavailable, an ``error`` event with ``retry_after`` takes its place.
+    """
+    if not text.strip():
+        yield "result", dict(fallback(EMPTY_RESPONSE_ANALYSIS, 'empty'))
+        return
+
+    with timed('cache_lookup'):
+        cache = get_evaluation_cache()
+        cache_key = cache.make_key(text, question, os.getenv('GPT_MODEL'))
+        cached = await cache.get(cache_key)
+    if cached is not None:
+        await record_response(session_id, question_index, question, text, ResponseAnalysis(**cached))
+        yield "result", cached
+        return
+
+    # A follower whose leader disconnected looks again, and leads if no one else has taken over
+    while cache_key in llm_flight:
+        COALESCED_CALLS.inc(target='analysis')
+        try:
+            joined, shared = await llm_flight.join(cache_key)
+        except LLMUnavailableError as e:
+            yield "error", {"error": str(e), "retry_after": e.retry_after}
+            return
+        except Exception:
+            joined, shared = True, fallback(ERROR_RESPONSE_ANALYSIS, 'error')
+        if joined:
+            await record_response(session_id, question_index, question, text, shared)
+            yield "result", dict(shared)
+            return
+
+    stream_parser = AnalysisStreamParser()
+    response_text = ''
+    # Concurrent identical requests, streamed or not, wait for this stream's result
+    with llm_flight.lead(cache_key) as flight:
+        try:
+            # Parsing happens inline as deltas arrive, so it is counted in the llm stage
+            with timed('llm'):
+                async for delta in stream_chat_completion(messages=build_evaluation_messages(text, question)):
+                    response_text += delta
+                    for event, data in stream_parser.feed(delta):
+                        yield event, data
+
+            try:
+                result = stream_parser.result()
+            except ParseError as e:
+                count_parse('analysis', response_text, False)
+                print(f"Could not parse evaluation: {e}")
+                flight.set_result(fallback(UNPARSEABLE_RESPONSE_ANALYSIS, 'unparseable'))
+                yield "result", dict(UNPARSEABLE_RESPONSE_ANALYSIS)
+                return
+            count_parse('analysis', response_text, True)
+            get_evaluation_cache().put(cache_key, dict(result))
+            flight.set_result(result)
+            await record_response(session_id, question_index, question, text, result)
+            yield "result", dict(result)
+        except LLMUnavailableError as e:
+            flight.set_exception(e)
+            yield "error", {"error": str(e), "retry_after": e.retry_after}
+        except Exception as e:
+            ERRORS.inc(stage='evaluate_stream')
+            print(f"Error in analyze_response_stream: {str(e)}")
+            flight.set_result(fallback(ERROR_RESPONSE_ANALYSIS, 'error'))
+            yield "result", dict(ERROR_RESPONSE_ANALYSIS)
+
+
+async def evaluate_packed(answers: List[Tuple[str, str]]) -> List[ResponseAnalysis]:
+    """Evaluate several answers in one LLM request, falling back to one request per answer."""
+    try:
+        with timed('llm'):
+            completion = await chat_completion(messages=build_batch_evaluation_messages(answers))
+        response_text = completion.choices[0].message.content
+        try:
+            with timed('parse'):
+                results = parse_analyses(response_text, len(answers))
+            count_parse('batch', response_text, True)
+            # Cache each answer as if it had been evaluated on its own, so a later submission skips the model
+            cache = get_evaluation_cache()
+            for (question, text), result in zip(answers, results):
+                cache.put(cache.make_key(text, question, os.getenv('GPT_MODEL')), dict(result))
+            return results
+        except ParseError as e:
+            count_parse('batch', response_text, False)
+            print(f"Could not parse batch evaluation, evaluating answers separately: {e}")
+    except LLMUnavailableError:
+        raise
+    except Exception as e:
+        ERRORS.inc(stage='evaluate_batch')
+        print(f"Error in evaluate_packed, evaluating answers separately: {str(e)}")
+    return await evaluate_fanout(answers)
+
+
+async def evaluate_fanout(answers: List[Tuple[str, str]]) -> List[ResponseAnalysis]:
+    """Evaluate answers concurrently, at most BATCH_EVALUATION_CONCURRENCY at a time."""
+    slots = asyncio.Semaphore(max(1, BATCH_EVALUATION_CONCURRENCY))
+
+    async def evaluate(question: str, text: str) -> ResponseAnalysis:
+        async with slots:
+            return await evaluate_response(text, question)
+
+    return list(await asyncio.gather(*(evaluate(question, text) for question, text in answers)))
+
+
+def interview_verdict(results: List[ResponseAnalysis]) -> InterviewVerdict:
+    """Average the scored ``results``; placeholders for failed evaluations must be left out."""
+    technical = sum(result.technical_score for result in results) / len(results)
+    communication = sum(result.communication_score for result in results) / len(results)
+    overall = (technical + communication) / 2
+    return InterviewVerdict(
+        technical_score=round(technical, 2),
+        communication_score=round(communication, 2),
+        overall_score=round(overall, 2),
+        passed=overall >= INTERVIEW_PASS_THRESHOLD
+    )
+
+
+async def evaluate_interview(answers: List[InterviewAnswer], mode: Optional[str] = None) -> BatchEvaluation:
+    """Evaluate every answer of an interview and return the overall verdict.
+
+    Empty answers and answers already in the evaluation cache are resolved
+    without the model. The rest are evaluated in one packed request or by
+    a bounded fan-out of single evaluations, depending on ``mode``.
+    Answers whose evaluation failed are listed in ``failed`` and left out of
+    the verdict, so an outage never reads as a low score. If none could be
+    scored, EvaluationUnavailable is raised.
+    """
+    mode = mode or BATCH_EVALUATION_MODE
+    if mode not in ('packed', 'fanout'):
+        raise InvalidRequest("mode must be 'packed' or 'fanout'.")
+    if not answers:
+        raise InvalidRequest("At least one answer is required.")
+    if len(answers) > BATCH_EVALUATION_MAX_ANSWERS:
+        raise InvalidRequest(f"At most {BATCH_EVALUATION_MAX_ANSWERS} answers can be evaluated at once.")
+
+    results: List[Optional[ResponseAnalysis]] = [None] * len(answers)
+    pending: List[int] = []
+    with timed('cache_lookup'):
+        for i, answer in enumerate(answers):
+            if not answer.text.strip():
+                results[i] = fallback(EMPTY_RESPONSE_ANALYSIS, 'empty')
+                continue
+            cache = get_evaluation_cache()
+            cached = await cache.get(cache.make_key(answer.text, answer.question, os.getenv('GPT_MODEL')))
+            if cached is not None:
+                results[i] = ResponseAnalysis(**cached)
+            else:
+                pending.append(i)
+
+    if pending:
+        pending_answers = [(answers[i].question, answers[i].text) for i in pending]
+        # A single remaining answer gains nothing from packing
+        evaluate = evaluate_packed if mode == 'packed' and len(pending_answers) > 1 else evaluate_fanout
+        for i, result in zip(pending, await evaluate(pending_answers)):
+            results[i] = result
+
+    failed = [i for i, result in enumerate(results) if result in (ERROR_RESPONSE_ANALYSIS, UNPARSEABLE_RESPONSE_ANALYSIS)]
+    scored = [result for i, result in enumerate(results) if i not in failed]
+    if not scored:
+        raise EvaluationUnavailable("Could not evaluate any answer. Please try again.")
+    return BatchEvaluation(results=results, verdict=interview_verdict(scored), failed=failed)
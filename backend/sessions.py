@@ -0,0 +1,200 @@
+import asyncio
+import json
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Session store settings, tunable from the environment
+SESSION_STORE_PATH = os.getenv('SESSION_STORE_PATH', 'interview_sessions.sqlite3')
+SESSION_BUSY_TIMEOUT = float(os.getenv('SESSION_BUSY_TIMEOUT', '5'))
+
+
+class SessionNotFound(Exception):
+    """Raised when a session id is unknown to the store."""
+
+
+def _settle(committed: asyncio.Future, error: Optional[Exception]) -> None:
+    # Runs on the writer's loop; the writer may have been cancelled meanwhile
+    if committed.done():
+        return
+    if error is None:
+        committed.set_result(None)
+    else:
+        committed.set_exception(error)
+
+
+class SessionStore:
+    """Interview sessions and an append-only response log in SQLite.
+
+    A session and each of its responses are committed before the call that
+    wrote them returns, so a reload served by any worker sees every answer
+    the candidate has been shown a result for. Responses recorded while a
+    commit is running share the next one, so concurrent evaluations do not
+    each pay for a commit. The database runs in WAL mode with a busy
+    timeout, so several ``uvicorn`` workers can share one file without
+    sticky sessions. A response is never updated in place: answering a
+    question again appends a new row and the latest row wins.
+    """
+
+    def __init__(self, path: Optional[str] = SESSION_STORE_PATH, busy_timeout: float = SESSION_BUSY_TIMEOUT):
+        # Rows waiting for the next commit, each with the future its writer awaits
+        self._pending: List[Tuple[Tuple, asyncio.Future]] = []
+        # Writers only take the queue lock, so they never wait behind a commit holding the connection
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._flush_wanted = asyncio.Event()
+        self._flush_task: Optional[asyncio.Task] = None
+
+        # An empty path keeps sessions in memory, which only suits a single worker
+        self._db = sqlite3.connect(path or ':memory:', timeout=busy_timeout, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, questions TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, question_index INTEGER NOT NULL, "
+            "question TEXT, text TEXT NOT NULL, analysis TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_by_session ON responses (session_id, seq)")
+        self._db.commit()
+
+    def create(self, questions: List[str]) -> Dict:
+        session_id = secrets.token_urlsafe(16)
+        created_at = time.time()
+        with self._db_lock:
+            self._db.execute(
+                "INSERT INTO sessions (session_id, questions, created_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(questions), created_at)
+            )
+            self._db.commit()
+        return self._snapshot(session_id, questions, created_at, [])
+
+    def get(self, session_id: str) -> Dict:
+        """Return the session with its latest response per question."""
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT questions, created_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                raise SessionNotFound(f"Interview session '{session_id}' was not found.")
+            rows = self._db.execute(
+                "SELECT question_index, question, text, analysis FROM responses WHERE session_id = ? ORDER BY seq",
+                (session_id,)
+            ).fetchall()
+        return self._snapshot(session_id, json.loads(row[0]), row[1], rows)
+
+    def questions(self, session_id: str) -> List[str]:
+        with self._db_lock:
+            row = self._db.execute("SELECT questions FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            raise SessionNotFound(f"Interview session '{session_id}' was not found.")
+        return json.loads(row[0])
+
+    def responses_since(self, seq: int, limit: int = 10000) -> List[Tuple]:
+        """Return up to ``limit`` log rows after ``seq`` as ``(seq, session_id, question_index, question, analysis)``."""
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT seq, session_id, question_index, question, analysis FROM responses WHERE seq > ? "
+                "ORDER BY seq LIMIT ?",
+                (seq, limit)
+            ).fetchall()
+
+    async def record(self, session_id: str, question_index: int, question: Optional[str], text: str,
+                     analysis: Dict) -> None:
+        """Write a response and return once it is committed."""
+        committed = asyncio.get_running_loop().create_future()
+        with self._lock:
+            self._pending.append(
+                ((session_id, question_index, question, text, json.dumps(analysis), time.time()), committed)
+            )
+        if self._flush_task is None or self._flush_task.done():
+            # Not started, or already stopped: nobody else will commit this row
+            await asyncio.to_thread(self.flush)
+        else:
+            # The writer may be running on another loop than the flush task, as in the local engine
+            self._flush_task.get_loop().call_soon_threadsafe(self._flush_wanted.set)
+        await committed
+
+    def flush(self) -> int:
+        """Write all queued responses in one transaction and return how many were written."""
+        # Taking the connection first keeps batches in the order they were queued
+        with self._db_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                self._db.executemany(
+                    "INSERT INTO responses (session_id, question_index, question, text, analysis, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    [row for row, _ in batch]
+                )
+                self._db.commit()
+            except sqlite3.Error as e:
+                self._db.rollback()
+                for _, committed in batch:
+                    committed.get_loop().call_soon_threadsafe(_settle, committed, e)
+                raise
+        for _, committed in batch:
+            committed.get_loop().call_soon_threadsafe(_settle, committed, None)
+        return len(batch)
+
+    def start(self) -> None:
+        # Already running, perhaps on another loop in this process; writers wake it from any thread
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await self._flush_wanted.wait()
+            self._flush_wanted.clear()
+            try:
+                # Commits may wait on other workers' locks, so keep them off the event loop.
+                # Responses recorded meanwhile queue up and share the next commit.
+                await asyncio.to_thread(self.flush)
+            except sqlite3.Error as e:
+                print(f"Error writing interview responses: {e}")
+
+    def close(self) -> None:
+        with self._db_lock:
+            self._db.close()
+
+    @staticmethod
+    def _snapshot(session_id: str, questions: List[str], created_at: float, rows: List[Tuple]) -> Dict:
+        latest: Dict[int, Dict] = {}
+        for question_index, question, text, analysis in rows:
+            latest[question_index] = {
+                'question_index': question_index,
+                'question': question,
+                'text': text,
+                'analysis': json.loads(analysis),
+            }
+        responses = [latest[index] for index in sorted(latest)]
+        return {
+            'session_id': session_id,
+            'questions': questions,
+            'current_question_index': max(latest) + 1 if latest else 0,
+            'responses': responses,
+            'created_at': created_at,
+        }
@@ -0,0 +1,93 @@
+import asyncio
+import hashlib
+import json
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+def flight_key(*parts: Any) -> str:
+    """Hash JSON-serializable parts (model, prompt, normalized input) into a coalescing key."""
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class FlightAbandoned(Exception):
+    """Set on a flight whose leader went away before finishing, so followers start over."""
+
+
+class SingleFlight:
+    """Coalesces concurrent async calls that share a key.
+
+    The first caller for a key starts the work; callers arriving while it
+    is in flight wait for the same result or exception instead of
+    repeating the call. The work runs in its own task, so a caller that
+    disconnects does not cancel it for the others. Work led by a caller
+    through ``lead`` stops when that caller goes away; its followers then
+    start over, and the first of them does the work itself. Nothing is
+    kept once the call finishes; caching is left to the caller.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._flights
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = asyncio.ensure_future(fn())
+                self._flights[key] = flight
+                flight.add_done_callback(lambda _: self._flights.pop(key, None))
+            try:
+                return await asyncio.shield(flight)
+            except FlightAbandoned:
+                continue
+
+    async def join(self, key: str) -> Tuple[bool, Any]:
+        """Wait for an in-flight call with ``key``.
+
+        Returns ``(True, result)`` if there was one, or ``(False, None)`` if
+        the caller should do the work itself, including when the call it
+        waited for was abandoned.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            return False, None
+        try:
+            return True, await asyncio.shield(flight)
+        except FlightAbandoned:
+            return False, None
+
+    @contextmanager
+    def lead(self, key: str) -> Iterator[asyncio.Future]:
+        """Register the caller as the one doing the work for ``key``.
+
+        For work that cannot be wrapped in a single coroutine, such as a
+        stream. Yields the future followers wait on; the caller sets its
+        result or exception. If the block raises first, followers get its
+        exception. If it is cancelled or closed, as when a streaming client
+        disconnects, followers start over instead. A block that ends without
+        a result gives followers a ``RuntimeError``.
+        """
+        flight = asyncio.get_running_loop().create_future()
+        self._flights[key] = flight
+        try:
+            yield flight
+        except BaseException as e:
+            if not flight.done():
+                flight.set_exception(e if isinstance(e, Exception) else FlightAbandoned())
+            raise
+        finally:
+            if not flight.done():
+                flight.set_exception(RuntimeError("Coalesced call finished without a result"))
+            # Mark any exception as retrieved so a flight without followers does not log a warning
+            flight.exception()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
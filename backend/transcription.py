@@ -0,0 +1,288 @@
+import asyncio
+import io
+import os
+import time
+import wave
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from dotenv import load_dotenv
+
+from .metrics import record_stage, timed
+
+# Audio libraries load on the first transcription, so text-only workers start without them
+if TYPE_CHECKING:
+    import speech_recognition as sr
+
+load_dotenv()
+
+# Transcription pool settings, tunable from the environment
+TRANSCRIPTION_ENGINE = os.getenv('TRANSCRIPTION_ENGINE', 'google')
+TRANSCRIPTION_WORKERS = int(os.getenv('TRANSCRIPTION_WORKERS', str(os.cpu_count() or 1)))
+TRANSCRIPTION_QUEUE_SIZE = int(os.getenv('TRANSCRIPTION_QUEUE_SIZE', '32'))
+TRANSCRIPTION_QUEUE_TIMEOUT = float(os.getenv('TRANSCRIPTION_QUEUE_TIMEOUT', '5'))
+TRANSCRIPTION_SEGMENT_SECONDS = float(os.getenv('TRANSCRIPTION_SEGMENT_SECONDS', '6'))
+TRANSCRIPTION_STREAM_MAX_SECONDS = float(os.getenv('TRANSCRIPTION_STREAM_MAX_SECONDS', '600'))
+
+# Sample rates a streamed answer may use, in Hz
+MIN_STREAM_SAMPLE_RATE = 8000
+MAX_STREAM_SAMPLE_RATE = 48000
+
+
+class TranscriptionQueueFull(Exception):
+    """Raised when no transcription slot frees up within the queue timeout."""
+
+
+class TranscriptionEngine:
+    """Base class for speech-to-text engines.
+
+    Subclasses implement ``recognize``. Engines marked ``cpu_bound`` run in a
+    process pool so they scale with cores; the others wait on the network
+    and run in a thread pool.
+    """
+    name = ''
+    cpu_bound = False
+
+    def make_recognizer(self) -> 'sr.Recognizer':
+        import speech_recognition as sr
+
+        recognizer = sr.Recognizer()
+
+        # Adjust recognizer parameters for better technical term recognition
+        recognizer.energy_threshold = 300  # Increased from default
+        recognizer.dynamic_energy_threshold = True
+        recognizer.dynamic_energy_adjustment_damping = 0.15
+        recognizer.dynamic_energy_ratio = 1.5
+        return recognizer
+
+    def transcribe(self, audio_content: bytes, timings: Optional[Dict[str, float]] = None) -> str:
+        """Transcribe a WAV/AIFF/FLAC clip, adding each stage's seconds to ``timings``."""
+        import numpy as np
+        import speech_recognition as sr
+
+        from .audio_analysis import extract_speech
+
+        timings = {} if timings is None else timings
+        started = time.perf_counter()
+        recognizer = self.make_recognizer()
+        with sr.AudioFile(io.BytesIO(audio_content)) as source:
+            audio_data = recognizer.record(source)
+        timings['decode'] = time.perf_counter() - started
+
+        # Send only voiced audio to the recognizer; nothing is spent on calibration
+        started = time.perf_counter()
+        sample_rate = audio_data.sample_rate
+        samples = np.frombuffer(audio_data.get_raw_data(convert_width=2), dtype=np.int16)
+        speech = extract_speech(samples, sample_rate)
+        timings['vad'] = time.perf_counter() - started
+        if speech.size == 0:
+            raise sr.UnknownValueError()
+
+        started = time.perf_counter()
+        try:
+            return self.recognize(recognizer, sr.AudioData(speech.tobytes(), sample_rate, 2))
+        finally:
+            timings['recognize'] = time.perf_counter() - started
+
+    def recognize(self, recognizer: 'sr.Recognizer', audio_data: 'sr.AudioData') -> str:
+        raise NotImplementedError
+
+
+class GoogleEngine(TranscriptionEngine):
+    """Google Web Speech API (requires network access)."""
+    name = 'google'
+
+    def recognize(self, recognizer: 'sr.Recognizer', audio_data: 'sr.AudioData') -> str:
+        return recognizer.recognize_google(audio_data, language="en-US")
+
+
+class SphinxEngine(TranscriptionEngine):
+    """Offline CMU Sphinx recognizer (requires the pocketsphinx package)."""
+    name = 'sphinx'
+    cpu_bound = True
+
+    def recognize(self, recognizer: 'sr.Recognizer', audio_data: 'sr.AudioData') -> str:
+        return recognizer.recognize_sphinx(audio_data, language="en-US")
+
+
+class StubEngine(TranscriptionEngine):
+    """Deterministic engine for offline benchmarks.
+
+    Decodes the audio like a real engine but returns a fixed transcript.
+    """
+    name = 'stub'
+    cpu_bound = True
+
+    def recognize(self, recognizer: 'sr.Recognizer', audio_data: 'sr.AudioData') -> str:
+        return os.getenv(
+            'TRANSCRIPTION_STUB_TEXT',
+            "I would design the API around stateless services behind a load balancer."
+        )
+
+
+ENGINES: Dict[str, Type[TranscriptionEngine]] = {
+    engine.name: engine for engine in (GoogleEngine, SphinxEngine, StubEngine)
+}
+
+# Engine instance owned by the current worker process or pool
+_worker_engine: Optional[TranscriptionEngine] = None
+
+
+def _init_worker(engine_name: str) -> None:
+    global _worker_engine
+    _worker_engine = ENGINES[engine_name]()
+
+
+def _transcribe_in_worker(audio_content: bytes) -> Tuple[str, Dict[str, float]]:
+    # Timings travel back with the text since worker processes cannot record metrics
+    timings: Dict[str, float] = {}
+    return _worker_engine.transcribe(audio_content, timings), timings
+
+
+class TranscriptionPool:
+    """Runs an engine on a worker pool behind a bounded job queue.
+
+    At most ``workers + queue_size`` jobs are admitted at once. Further
+    callers wait up to ``queue_timeout`` seconds for a slot and then get
+    ``TranscriptionQueueFull`` so the API can shed load instead of queueing
+    without bound.
+    """
+
+    def __init__(self, engine_name: str = TRANSCRIPTION_ENGINE, workers: int = TRANSCRIPTION_WORKERS,
+                 queue_size: int = TRANSCRIPTION_QUEUE_SIZE, queue_timeout: float = TRANSCRIPTION_QUEUE_TIMEOUT):
+        if engine_name not in ENGINES:
+            raise ValueError(f"Unknown transcription engine '{engine_name}'. Choose one of: {', '.join(ENGINES)}")
+        self.engine_name = engine_name
+        self.workers = max(1, workers)
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(self.workers + max(0, queue_size))
+
+        executor_cls = ProcessPoolExecutor if ENGINES[engine_name].cpu_bound else ThreadPoolExecutor
+        self._executor: Executor = executor_cls(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(engine_name,)
+        )
+
+    async def transcribe(self, audio_content: bytes) -> str:
+        try:
+            with timed('transcription_queue'):
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise TranscriptionQueueFull("Transcription service is busy. Please try again shortly.")
+        try:
+            loop = asyncio.get_running_loop()
+            text, timings = await loop.run_in_executor(self._executor, _transcribe_in_worker, audio_content)
+        finally:
+            self._slots.release()
+        for stage, seconds in timings.items():
+            record_stage(stage, seconds)
+        return text
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap raw 16-bit mono PCM in a WAV container."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class StreamLimitExceeded(Exception):
+    """Raised when a live audio stream runs longer than allowed."""
+
+
+class StreamingTranscription:
+    """Transcribes a live 16-bit mono PCM stream segment by segment.
+
+    Audio is cut into segments of about ``segment_seconds``, at the quietest
+    20 ms frame of the last second so words are not split. Each segment is
+    transcribed on the pool while the candidate keeps speaking, and
+    ``on_segment`` is awaited with each partial result. ``finish`` only has
+    to transcribe the final segment.
+    """
+
+    def __init__(self, pool: TranscriptionPool, sample_rate: int,
+                 on_segment: Optional[Callable[[int, str], Awaitable[None]]] = None,
+                 segment_seconds: float = TRANSCRIPTION_SEGMENT_SECONDS,
+                 max_seconds: float = TRANSCRIPTION_STREAM_MAX_SECONDS):
+        self.pool = pool
+        self.sample_rate = sample_rate
+        self.on_segment = on_segment
+        self.max_bytes = int(max_seconds * sample_rate) * 2
+        self._segment_bytes = int(segment_seconds * sample_rate) * 2
+        self._search_bytes = min(self._segment_bytes // 4, sample_rate) * 2
+        self._buffer = bytearray()
+        self._received = 0
+        self._tasks: List[asyncio.Task] = []
+
+    def feed(self, pcm: bytes) -> None:
+        self._received += len(pcm)
+        if self._received > self.max_bytes:
+            raise StreamLimitExceeded("Recording is too long. Please keep your answer shorter.")
+        self._buffer += pcm
+        while len(self._buffer) >= self._segment_bytes:
+            cut = self._find_cut()
+            self._submit(bytes(self._buffer[:cut]))
+            del self._buffer[:cut]
+
+    def _find_cut(self) -> int:
+        start = self._segment_bytes - self._search_bytes
+        import numpy as np
+
+        from .audio_analysis import frame_energies
+
+        window = np.frombuffer(self._buffer, dtype=np.int16, count=self._search_bytes // 2, offset=start)
+        energies, frame = frame_energies(window, self.sample_rate)
+        return start + int(np.argmin(energies)) * frame * 2
+
+    def _submit(self, pcm: bytes) -> None:
+        self._tasks.append(asyncio.create_task(self._transcribe(len(self._tasks), pcm)))
+
+    async def _transcribe(self, index: int, pcm: bytes) -> str:
+        import speech_recognition as sr
+
+        try:
+            text = await self.pool.transcribe(pcm_to_wav(pcm, self.sample_rate))
+        except sr.UnknownValueError:
+            # Silence or unintelligible audio in this segment
+            text = ''
+        if self.on_segment is not None:
+            await self.on_segment(index, text)
+        return text
+
+    async def finish(self) -> str:
+        """Transcribe the remaining audio and return the full transcript."""
+        if len(self._buffer) >= 2:
+            self._submit(bytes(self._buffer[:len(self._buffer) // 2 * 2]))
+        self._buffer.clear()
+        texts = await asyncio.gather(*self._tasks)
+        return ' '.join(text for text in texts if text)
+
+    def cancel(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+
+_pool: Optional[TranscriptionPool] = None
+
+
+def get_pool() -> TranscriptionPool:
+    """Return the process-wide transcription pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        _pool = TranscriptionPool()
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
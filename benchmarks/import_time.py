@@ -0,0 +1,131 @@
+"""Import-time benchmark for the three entry points.
+
+Imports each entry point in a fresh interpreter and reports the median time
+taken. It also lists any heavy module that should only load on first use
+but was imported eagerly. Those modules are the OpenAI SDK, the audio stack
+and NumPy. Any file an import creates in the working directory, such as a
+store's database, is listed too. Run from the repository root::
+
+    python -m benchmarks.import_time --repeat 7 --budget backend=600
+
+The Streamlit scripts are measured by running only their top-level import
+statements. Executing the scripts themselves would render the page and call
+the backend. The command exits with status 1 when an entry point goes over
+its budget, eagerly imports a deferred module or creates a file, so it can
+guard a CI job against regressions.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (what to import, extra sys.path entries, modules that must stay unloaded, budget in milliseconds)
+ENTRY_POINTS = {
+    'backend': (
+        'import backend.main', (REPO_ROOT,),
+        ('openai', 'httpx', 'numpy', 'speech_recognition'), 800,
+    ),
+    'frontend': (
+        'frontend/app.py', (os.path.join(REPO_ROOT, 'frontend'), REPO_ROOT),
+        ('sounddevice', 'numpy', 'scipy', 'websockets', 'audio_processing', 'backend', 'openai', 'fastapi'), 800,
+    ),
+    'standalone': (
+        'main.py', (REPO_ROOT,),
+        ('backend', 'openai', 'numpy'), 800,
+    ),
+}
+
+PROBE = """
+import json, sys, time
+sys.path[:0] = {paths!r}
+source = {source!r}
+started = time.perf_counter()
+exec(compile(source, {name!r}, 'exec'), {{'__name__': '__import_probe__'}})
+elapsed = time.perf_counter() - started
+print(json.dumps({{'seconds': elapsed, 'loaded': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def script_imports(path: str) -> str:
+    """Return just the module-level import statements of a script."""
+    with open(path, 'r', encoding='utf-8') as f:
+        tree = ast.parse(f.read(), filename=path)
+    imports = [node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return ast.unparse(ast.Module(body=imports, type_ignores=[]))
+
+
+def probe(name: str, repeat: int) -> Dict:
+    target, paths, deferred, _ = ENTRY_POINTS[name]
+    source = target if target.startswith('import ') else script_imports(os.path.join(REPO_ROOT, target))
+    code = PROBE.format(paths=list(paths), source=source, name=name, deferred=deferred)
+    env = {**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'}
+
+    timings: List[float] = []
+    loaded: List[str] = []
+    created: List[str] = []
+    # Imports should create no files; an empty scratch directory shows any that appear
+    with tempfile.TemporaryDirectory() as cwd:
+        for _ in range(repeat):
+            result = subprocess.run(
+                [sys.executable, '-c', code], cwd=cwd, env=env, capture_output=True, text=True, check=False
+            )
+            if result.returncode != 0:
+                raise RuntimeError(f"Importing {name} failed:\n{result.stderr}")
+            measurement = json.loads(result.stdout.strip().splitlines()[-1])
+            timings.append(measurement['seconds'])
+            loaded = measurement['loaded']
+            created = sorted(os.listdir(cwd))
+    return {
+        'entry_point': name,
+        'median_ms': statistics.median(timings) * 1000,
+        'min_ms': min(timings) * 1000,
+        'eagerly_loaded': loaded,
+        'created_files': created,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the AI Recruiter entry points.")
+    parser.add_argument('--entry-points', default=','.join(ENTRY_POINTS), help="Comma-separated subset of: " + ', '.join(ENTRY_POINTS))
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per entry point")
+    parser.add_argument('--budget', action='append', default=[], metavar='NAME=MS', help="Override an entry point's budget in milliseconds")
+    parser.add_argument('--output', help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    budgets = {name: spec[3] for name, spec in ENTRY_POINTS.items()}
+    for override in args.budget:
+        name, _, ms = override.partition('=')
+        if name not in budgets or not ms:
+            parser.error(f"--budget expects NAME=MS with NAME in {', '.join(ENTRY_POINTS)}")
+        budgets[name] = float(ms)
+
+    results = []
+    failed = False
+    print(f"{'entry point':<12} {'median':>9} {'min':>9} {'budget':>9}  eagerly imported or created")
+    for name in args.entry_points.split(','):
+        result = probe(name, max(1, args.repeat))
+        result['budget_ms'] = budgets[name]
+        result['ok'] = (result['median_ms'] <= budgets[name] and not result['eagerly_loaded']
+                        and not result['created_files'])
+        failed = failed or not result['ok']
+        results.append(result)
+        print(
+            f"{name:<12} {result['median_ms']:>7.0f}ms {result['min_ms']:>7.0f}ms {budgets[name]:>7.0f}ms  "
+            f"{', '.join(result['eagerly_loaded'] + result['created_files']) or '-'}{'' if result['ok'] else '  FAIL'}"
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
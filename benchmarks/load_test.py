@@ -0,0 +1,274 @@
+"""Offline load test for the FastAPI backend.
+
+Starts the mock chat-completions server and the backend (with the stub
+speech recognizer) as local subprocesses, then drives ``/questions``,
+``/analyze-response`` and ``/speech-to-text`` at increasing concurrency.
+For every endpoint and level it reports throughput, p50/p95/p99 latency,
+errors and the resident memory of each backend worker. Nothing leaves the
+machine. Run from the repository root::
+
+    python -m benchmarks.load_test --concurrency 1,8,32,64 --workers 2 --latency lognormal:0.8:0.5
+"""
+import argparse
+import asyncio
+import io
+import itertools
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from typing import Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+ENDPOINTS = ('questions', 'analyze-response', 'speech-to-text')
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def speech_wav(seconds: float = 4.0, sample_rate: int = 16000) -> bytes:
+    """Synthesize a voiced-sounding clip (tone bursts over faint noise) for the stub recognizer."""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    envelope = (np.sin(2 * np.pi * 1.5 * t) > -0.3).astype(np.float64)
+    signal = envelope * 0.3 * np.sin(2 * np.pi * 180 * t) + rng.normal(0, 0.002, t.size)
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes((np.clip(signal, -1, 1) * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return float('nan')
+    rank = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def _children(pid: int) -> List[int]:
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # The parent pid is the second field after the parenthesised command name
+                parent = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        if parent == pid:
+            children.append(int(entry))
+    return children
+
+
+def _is_helper(pid: int) -> bool:
+    # The multiprocessing resource tracker is a child of the supervisor but not a worker
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as f:
+            return b'resource_tracker' in f.read()
+    except OSError:
+        return True
+
+
+def worker_memory(server_pid: int, workers: int) -> List[float]:
+    """RSS in MB of each uvicorn worker, including its transcription subprocesses.
+
+    Reads ``/proc``, so it reports nothing on platforms without it.
+    """
+    if not os.path.isdir('/proc'):
+        return []
+    # A single worker is served by the uvicorn process itself; otherwise it supervises the workers
+    worker_pids = [pid for pid in _children(server_pid) if not _is_helper(pid)] if workers > 1 else [server_pid]
+    memory = []
+    for worker in worker_pids:
+        stack, total = [worker], 0.0
+        while stack:
+            pid = stack.pop()
+            total += _rss_mb(pid)
+            stack.extend(_children(pid))
+        memory.append(round(total, 1))
+    return memory
+
+
+def start_server(app: str, port: int, env: Dict[str, str], workers: int = 1, factory: bool = False) -> subprocess.Popen:
+    command = [sys.executable, '-m', 'uvicorn', app, '--port', str(port), '--log-level', 'warning']
+    if factory:
+        command.append('--factory')
+    if workers > 1:
+        command += ['--workers', str(workers)]
+    return subprocess.Popen(command, env={**os.environ, **env})
+
+
+def wait_until_up(url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start within {timeout:.0f}s")
+
+
+async def run_level(client: httpx.AsyncClient, send: Callable[[int], "asyncio.Future"], concurrency: int,
+                    total: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal errors, next_index
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            started = time.perf_counter()
+            try:
+                response = await send(index)
+                ok = response.status_code == 200 and 'error' not in response.json()
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "errors": errors,
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+async def run_benchmark(base_url: str, endpoints: List[str], levels: List[int], requests_per_level: int,
+                        server_pid: int, workers: int) -> List[Dict]:
+    audio = speech_wav()
+    run_id = int(time.time())
+    answer_ids = itertools.count()
+
+    def sender(client: httpx.AsyncClient, endpoint: str) -> Callable[[int], "asyncio.Future"]:
+        if endpoint == 'questions':
+            return lambda i: client.get('/questions')
+        if endpoint == 'analyze-response':
+            # Unique answers so the evaluation cache never short-circuits the LLM call
+            return lambda i: client.post('/analyze-response', json={
+                "text": f"Run {run_id} answer {next(answer_ids)}: I would put a token bucket in front of each API key.",
+                "question": "How would you design a rate limiter for a public REST API?",
+            })
+        return lambda i: client.post('/speech-to-text', files={'audio': ('answer.wav', audio, 'audio/wav')})
+
+    results = []
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+        for endpoint in endpoints:
+            send = sender(client, endpoint)
+            # Warm connections, worker pools and the question pool before measuring
+            await run_level(client, send, min(4, max(levels)), 4)
+            for level in levels:
+                result = await run_level(client, send, level, max(requests_per_level, level * 2))
+                result["endpoint"] = endpoint
+                result["worker_rss_mb"] = worker_memory(server_pid, workers)
+                results.append(result)
+                print_row(result)
+    return results
+
+
+def print_row(result: Dict) -> None:
+    memory = ' '.join(f"{mb:.0f}" for mb in result["worker_rss_mb"]) or '-'
+    print(
+        f"{result['endpoint']:<18} {result['concurrency']:>5} {result['requests']:>6} {result['errors']:>6} "
+        f"{result['throughput']:>9.1f} {result['p50_ms']:>9.1f} {result['p95_ms']:>9.1f} {result['p99_ms']:>9.1f}  {memory}",
+        flush=True
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline load test for the AI Recruiter backend.")
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS), help="Comma-separated subset of: " + ', '.join(ENDPOINTS))
+    parser.add_argument('--concurrency', default='1,4,16,64', help="Comma-separated concurrency levels")
+    parser.add_argument('--requests', type=int, default=100, help="Requests per level (at least twice the concurrency)")
+    parser.add_argument('--workers', type=int, default=1, help="uvicorn workers for the backend")
+    parser.add_argument('--latency', default='lognormal:0.5:0.4', help="Mock LLM latency: fixed:S, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA")
+    parser.add_argument('--malformed-rate', type=float, default=0.05, help="Share of evaluations the mock returns malformed")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of mock requests answered with HTTP 429")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="Also write the results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    endpoints = [e for e in args.endpoints.split(',') if e]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    mock_port, api_port = free_port(), free_port()
+    state_dir = tempfile.mkdtemp(prefix='ai-recruiter-bench-')
+    mock = start_server('benchmarks.mock_openai:app_from_env', mock_port, {
+        'MOCK_OPENAI_LATENCY': args.latency,
+        'MOCK_OPENAI_MALFORMED_RATE': str(args.malformed_rate),
+        'MOCK_OPENAI_ERROR_RATE': str(args.error_rate),
+        'MOCK_OPENAI_SEED': str(args.seed),
+    }, factory=True)
+    api = start_server('backend.main:app', api_port, {
+        'OPENAI_API_KEY': 'benchmark',
+        'OPENAI_BASE_URL': f'http://127.0.0.1:{mock_port}/v1',
+        'GPT_MODEL': 'mock',
+        'TRANSCRIPTION_ENGINE': 'stub',
+        'QUESTION_POOL_PATH': '',
+        'EVALUATION_CACHE_PATH': '',
+        'SESSION_STORE_PATH': os.path.join(state_dir, 'sessions.sqlite3'),
+        'QUESTION_BANK_PATH': os.path.join(state_dir, 'question_bank.sqlite3'),
+    }, workers=args.workers)
+
+    try:
+        wait_until_up(f'http://127.0.0.1:{mock_port}/stats')
+        wait_until_up(f'http://127.0.0.1:{api_port}/')
+        print(f"{'endpoint':<18} {'conc':>5} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  worker RSS MB")
+        results = asyncio.run(run_benchmark(
+            f'http://127.0.0.1:{api_port}', endpoints, levels, args.requests, api.pid, args.workers
+        ))
+    finally:
+        for process in (api, mock):
+            process.terminate()
+        for process in (api, mock):
+            process.wait(timeout=10)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
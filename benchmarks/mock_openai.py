@@ -0,0 +1,157 @@
+"""Local stand-in for the OpenAI chat-completions API.
+
+Answers ``POST /v1/chat/completions`` (plain and streamed) after a
+simulated delay, so the backend can be benchmarked without network access
+or API spend. Run it with::
+
+    python -m benchmarks.mock_openai --port 9100 --latency lognormal:0.8:0.5 --malformed-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from typing import Callable
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+QUESTIONS = [
+    "How would you design a rate limiter for a public REST API?",
+    "Explain how you would shard a relational database that has outgrown a single node.",
+    "How do you version an API without breaking existing clients?",
+    "What steps do you take to protect an API against injection attacks?",
+    "How would you find the cause of a slow endpoint in production?",
+]
+
+# Shapes of broken model output seen in practice, in rough order of frequency
+MALFORMED_ANALYSES = [
+    'Here is my evaluation:\n```json\n{"technical_score": 6, "communication_score": 7, "feedback": "Solid answer."}\n```',
+    '{"technical_score": 6, "communication_score": 7, "feedback": "Cut off mid-sent',
+    'The candidate did well overall. Technical: 6/10, communication: 7/10.',
+]
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """Build a delay sampler from ``fixed:S``, ``uniform:LOW:HIGH`` or ``lognormal:MEDIAN:SIGMA``."""
+    kind, *params = spec.split(':')
+    values = [float(p) for p in params]
+    if kind == 'fixed' and len(values) == 1:
+        return lambda: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == 'lognormal' and len(values) == 2:
+        median, sigma = values
+        return lambda: median * random.lognormvariate(0, sigma)
+    raise ValueError(f"Invalid latency spec '{spec}'. Use fixed:S, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA")
+
+
+def create_app(latency: str = 'fixed:0.5', malformed_rate: float = 0.0, error_rate: float = 0.0,
+               seed: int = None) -> FastAPI:
+    if seed is not None:
+        random.seed(seed)
+    sample_latency = parse_latency(latency)
+    app = FastAPI()
+    app.state.requests = 0
+
+    def content_for(messages) -> str:
+        if 'Generate' in messages[-1]['content']:
+            return json.dumps(random.sample(QUESTIONS, len(QUESTIONS)))
+        if random.random() < malformed_rate:
+            return random.choice(MALFORMED_ANALYSES)
+        return json.dumps({
+            "technical_score": random.randint(3, 10),
+            "communication_score": random.randint(3, 10),
+            "feedback": "The answer covers the main trade-offs but could go deeper on failure handling. " * 3,
+        })
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        if random.random() < error_rate:
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "requests"}},
+                headers={"retry-after": "1"}
+            )
+
+        delay = sample_latency()
+        content = content_for(body['messages'])
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        model = body.get('model', 'mock')
+        prompt_tokens = sum(len(m['content'].split()) for m in body['messages'])
+        completion_tokens = len(content.split())
+
+        if not body.get('stream'):
+            await asyncio.sleep(delay)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                },
+            }
+
+        async def stream():
+            # Spread the delay over the tokens, like a real model writing its answer
+            pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or ['']
+            for piece in pieces:
+                await asyncio.sleep(delay / len(pieces))
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    async def stats():
+        return {"requests": app.state.requests}
+
+    return app
+
+
+def app_from_env() -> FastAPI:
+    """Factory for ``uvicorn --factory`` that reads its settings from MOCK_OPENAI_* variables."""
+    seed = os.getenv('MOCK_OPENAI_SEED')
+    return create_app(
+        latency=os.getenv('MOCK_OPENAI_LATENCY', 'fixed:0.5'),
+        malformed_rate=float(os.getenv('MOCK_OPENAI_MALFORMED_RATE', '0')),
+        error_rate=float(os.getenv('MOCK_OPENAI_ERROR_RATE', '0')),
+        seed=int(seed) if seed else None,
+    )
+
+
+if __name__ == '__main__':
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency', default='fixed:0.5', help="fixed:S, uniform:LOW:HIGH or lognormal:MEDIAN:SIGMA")
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help="Share of evaluations returned malformed")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of requests answered with HTTP 429")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_app(args.latency, args.malformed_rate, args.error_rate, args.seed),
+        host=args.host, port=args.port, log_level='warning'
+    )
@@ -1,31 +1,79 @@
 import streamlit as st
-import requests
-import json
-import sounddevice as sd
-import numpy as np
-import scipy.io.wavfile as wav
 import os
+import sys
+import time
 
-def display_analysis(analysis, text):
+# The interview engine package lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from interview_engine import EngineError, create_engine
+
+# Audio and WebSocket libraries are imported by the voice path on first use, so typed answers never load them
+
+def display_analysis(analysis, text, question):
     st.markdown("### Analysis Results")
     st.markdown("**Your Response:**")
     st.markdown(f"""<div style='padding: 1rem; border-left: 3px solid #1f77b4; margin: 1rem 0;'>
         {text}
     </div>""", unsafe_allow_html=True)
-    st.markdown(f"**Technical Score:** {analysis['technical_score']}/10")
-    st.markdown(f"**Communication Score:** {analysis['communication_score']}/10")
+    technical_placeholder = st.empty()
+    communication_placeholder = st.empty()
     st.markdown("**Feedback:**")
-    st.markdown(f"""<div style='padding: 1rem; background-color: #ffffff; border: 1px solid #ddd; border-radius: 0.5rem; margin: 1rem 0;'>
-        {analysis['feedback']}
+    feedback_placeholder = st.empty()
+
+    # Render streamed (event, data) pairs as they arrive; a plain dict is a finished result
+    events = [("result", analysis)] if isinstance(analysis, dict) else analysis
+    scores = {}
+    feedback = ""
+    result = None
+    for event, data in events:
+        if event == "score":
+            scores.update(data)
+        elif event == "feedback":
+            feedback += data["delta"]
+        elif event == "error":
+            st.error(f"{data['error']}")
+            return
+        elif event == "result":
+            result = data
+            scores = {k: data.get(k) for k in ['technical_score', 'communication_score']}
+            feedback = data.get('feedback', '')
+        technical_placeholder.markdown(f"**Technical Score:** {scores.get('technical_score', '…')}/10")
+        communication_placeholder.markdown(f"**Communication Score:** {scores.get('communication_score', '…')}/10")
+        feedback_placeholder.markdown(f"""<div style='padding: 1rem; background-color: #ffffff; border: 1px solid #ddd; border-radius: 0.5rem; margin: 1rem 0;'>
+        {feedback or '…'}
     </div>""", unsafe_allow_html=True)
-    
-    # Automatically advance to next question after displaying analysis
-    if st.session_state.current_question_index < len(st.session_state.questions) - 1:
-        st.session_state.current_question_index += 1
-        st.rerun()
-    else:
-        # Calculate final scores when all questions are answered
-        display_final_assessment()
+
+    if not (isinstance(result, dict) and all(k in result for k in ['technical_score', 'communication_score', 'feedback'])):
+        st.error("Received invalid response format from server. Please try again.")
+        return
+
+    st.session_state.responses.append({
+        'question_index': st.session_state.current_question_index,
+        'question': question,
+        'text': text,
+        'analysis': result
+    })
+
+    # Advance in place; the rest of the panel is drawn after this, so it already shows the next question
+    st.session_state.current_question_index += 1
+
+def display_response(number, response):
+    st.markdown(f"**Question {number}:**")
+    st.markdown(f"""<div style='background-color: #f0f2f6; padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;'>
+        {response['question']}
+    </div>""", unsafe_allow_html=True)
+    st.markdown("**Your Answer:**")
+    st.markdown(f"""<div style='padding: 1rem; border-left: 3px solid #1f77b4; margin-bottom: 1rem;'>
+        {response['text']}
+    </div>""", unsafe_allow_html=True)
+    st.markdown(f"**Technical Score:** {response['analysis']['technical_score']}/10")
+    st.markdown(f"**Communication Score:** {response['analysis']['communication_score']}/10")
+    st.markdown("**Feedback:**")
+    st.markdown(f"""<div style='padding: 1rem; background-color: #ffffff; border: 1px solid #ddd; border-radius: 0.5rem; margin-bottom: 1rem;'>
+        {response['analysis']['feedback']}
+    </div>""", unsafe_allow_html=True)
+    st.markdown("---")
 
 # Function to calculate average scores and display final assessment
 def display_final_assessment():
@@ -107,131 +155,262 @@ if 'recording' not in st.session_state:
 if 'audio_data' not in st.session_state:
     st.session_state.audio_data = []
 
-# Backend API URL
-API_URL = "http://localhost:8000"
+# question_index: (question, answer, future) for answers still being evaluated in pipelined mode
+if 'background_evaluations' not in st.session_state:
+    st.session_state.background_evaluations = {}
+
+# "http" calls the backend API at INTERVIEW_API_URL; "local" runs the backend inside this process
+INTERVIEW_ENGINE = os.getenv('INTERVIEW_ENGINE', 'http')
+
+# Stream microphone audio to the backend while recording instead of uploading it afterwards
+STREAMING_AUDIO = os.getenv('STREAMING_AUDIO', 'true').lower() in ('1', 'true', 'yes')
 
-def fetch_questions():
+# Evaluate typed answers in the background and show the next question straight away
+PIPELINED_INTERVIEW = os.getenv('PIPELINED_INTERVIEW', 'false').lower() in ('1', 'true', 'yes')
+
+# Upload recordings as lossless FLAC (requires the soundfile package) instead of WAV
+COMPRESS_AUDIO = os.getenv('COMPRESS_AUDIO', 'false').lower() in ('1', 'true', 'yes')
+
+@st.cache_resource
+def get_engine():
+    # One engine per process, shared by every browser session
+    return create_engine(INTERVIEW_ENGINE)
+
+def load_session():
+    # The interview lives on the backend; its id in the URL lets a reload resume it
+    session_id = st.query_params.get("session")
     try:
-        response = requests.get(f"{API_URL}/questions")
-        if response.status_code == 200:
-            st.session_state.questions = response.json()
-            return True
-        else:
-            st.error(f"Failed to fetch questions: {response.text}")
-            return False
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error connecting to the backend: {str(e)}")
+        session = get_engine().resume_interview(session_id) if session_id else None
+        if session is None:
+            # New visit, or an unknown or expired link, so start a fresh interview
+            session = get_engine().start_interview()
+    except EngineError as e:
+        st.error(f"Failed to fetch questions: {str(e)}")
         return False
 
-def record_audio():
+    st.session_state.session_id = session['session_id']
+    st.session_state.questions = session['questions']
+    st.session_state.current_question_index = session['current_question_index']
+    st.session_state.responses = session['responses']
+    st.query_params["session"] = session['session_id']
+    return True
+
+def session_fields():
+    # Tells the backend which session and question an answer belongs to
+    return {"session_id": st.session_state.session_id, "question_index": st.session_state.current_question_index}
+
+class StreamingRecorder:
+    """Streams microphone audio to the interview engine while recording.
+
+    Completed segments are transcribed as they arrive, so stopping only
+    waits for the last segment and the evaluation.
+    """
+    SAMPLE_RATE = 16000
+
+    def __init__(self, question):
+        import sounddevice as sd
+
+        self._voice = get_engine().open_voice_stream(self.SAMPLE_RATE, question, **session_fields())
+        self.partials = self._voice.partials
+        self._stream = sd.InputStream(samplerate=self.SAMPLE_RATE, channels=1, dtype='int16', callback=self._on_audio)
+        self._stream.start()
+
+    def _on_audio(self, indata, frames, time, status):
+        # Runs on the audio thread; feeding never blocks
+        self._voice.feed(indata.tobytes())
+
+    def stop(self, timeout=60):
+        self._stream.stop()
+        self._stream.close()
+        return self._voice.finish(timeout)
+
+def record_audio(question):
+    # Runs as a button callback, so errors are kept for the panel to show
+    if STREAMING_AUDIO:
+        try:
+            st.session_state.recorder = StreamingRecorder(question)
+        except EngineError as e:
+            st.session_state.recording_error = str(e)
+            return
+        except Exception as e:
+            st.session_state.recording_error = f"Error starting the recording: {str(e)}"
+            return
+        st.session_state.recording = True
+        return
+
+    import sounddevice as sd
+
     fs = 44100  # Sample rate
     duration = 30  # Recording duration in seconds
     st.session_state.recording = True
+    st.session_state.recording_started = time.monotonic()
     st.session_state.audio_data = sd.rec(int(fs * duration), samplerate=fs, channels=1, dtype='float32')
 
+def finish_streaming_recording():
+    st.session_state.recording = False
+    recorder = st.session_state.pop('recorder', None)
+    if recorder is None:
+        return None, None
+    try:
+        text, analysis = recorder.stop()
+    except EngineError as e:
+        st.error(f"Error analyzing response: {str(e)}")
+        return None, None
+    return analysis, text
+
 def stop_recording():
+    import sounddevice as sd
+    from audio_processing import encode_audio, preprocess_recording
+
     sd.stop()
     st.session_state.recording = False
     if len(st.session_state.audio_data) > 0:
-        # Save the recorded audio
-        wav.write('temp_recording.wav', 44100, st.session_state.audio_data)
-        return True
-    return False
+        # Upload only the captured speech as compact 16 kHz PCM, straight from memory
+        recorded_frames = int((time.monotonic() - st.session_state.recording_started) * 44100)
+        samples = preprocess_recording(st.session_state.audio_data, 44100, recorded_frames)
+        st.session_state.audio_data = []
+        if samples.size == 0:
+            st.error("No speech was detected. Please try recording again.")
+            return None
+        return encode_audio(samples, compress=COMPRESS_AUDIO)
+    return None
 
-def analyze_response(audio_file):
+def analyze_response(upload, question):
     try:
-        files = {'audio': ('audio.wav', open(audio_file, 'rb'), 'audio/wav')}
-        response = requests.post(f"{API_URL}/speech-to-text", files=files)
-        if response.status_code == 200:
-            text_response = response.json().get('text', '')
-            analysis_response = requests.post(
-                f"{API_URL}/analyze-response",
-                json={"text": text_response}
-            )
-            if analysis_response.status_code == 200:
-                return analysis_response.json(), text_response
-    except Exception as e:
+        # Transcription and evaluation happen in a single call
+        text, analysis = get_engine().transcribe_and_evaluate(upload[0], upload[1], upload[2], question,
+                                                              **session_fields())
+        return analysis, text
+    except EngineError as e:
         st.error(f"Error analyzing response: {str(e)}")
     return None, None
 
-# Main UI
-st.title("🎯 AI Technical Recruiter")
+def evaluate_in_background(text, question):
+    question_index = st.session_state.current_question_index
+    future = get_engine().submit_evaluation(text, question, **session_fields())
+    st.session_state.background_evaluations[question_index] = (question, text, future)
+    st.session_state.current_question_index += 1
 
-# Fetch questions if not already loaded
-if not st.session_state.questions:
-    with st.spinner("Loading interview questions..."):
-        if not fetch_questions():
-            st.error("Failed to load questions. Please refresh the page to try again.")
-            st.stop()
+def collect_evaluations(wait=False):
+    # Finished evaluations join the responses in question order, so the history stays numbered correctly
+    pending = st.session_state.background_evaluations
+    for question_index in sorted(pending):
+        question, text, future = pending[question_index]
+        if not (wait or future.done()):
+            break
+        try:
+            analysis = future.result()
+        except EngineError as e:
+            st.error(f"Could not evaluate your answer to question {question_index + 1}: {str(e)}")
+            return False
+        del pending[question_index]
+        st.session_state.responses.append({
+            'question_index': question_index,
+            'question': question,
+            'text': text,
+            'analysis': analysis
+        })
+    return True
+
+def retry_failed_evaluations():
+    pending = st.session_state.background_evaluations
+    for question_index, (question, text, future) in list(pending.items()):
+        if future.done() and future.exception() is not None:
+            pending[question_index] = (question, text, get_engine().submit_evaluation(
+                text, question, session_id=st.session_state.session_id, question_index=question_index
+            ))
+
+def submit_text_response(question_index):
+    # Runs before the panel redraws, so the redraw evaluates the answer and then shows the next question
+    st.session_state.pending_answer = ('text', st.session_state.get(f"text_response_{question_index}", ""))
+
+def submit_recording():
+    st.session_state.pending_answer = ('voice', None)
+
+def evaluate_pending_answer(question):
+    kind, text_response = st.session_state.pop('pending_answer')
+    if kind == 'voice':
+        if STREAMING_AUDIO:
+            # Most segments are already transcribed; only the tail is left
+            with st.spinner("Analyzing your response..."):
+                analysis, text = finish_streaming_recording()
+            if analysis and text:
+                display_analysis(analysis, text, question)
+        else:
+            upload = stop_recording()
+            if upload:
+                with st.spinner("Analyzing your response..."):
+                    analysis, text = analyze_response(upload, question)
+                if analysis and text:
+                    display_analysis(analysis, text, question)
+    elif text_response.strip() and PIPELINED_INTERVIEW:
+        # The candidate moves on while the model works; results are gathered before the final assessment
+        evaluate_in_background(text_response, question)
+        st.info("Answer submitted. It is being evaluated while you continue.")
+    elif text_response.strip():
+        try:
+            # Scores and feedback are rendered while the model is still writing them
+            events = get_engine().stream_evaluation(text_response, question, **session_fields())
+            display_analysis(events, text_response, question)
+        except EngineError as e:
+            st.error(str(e))
+        except Exception as e:
+            st.error(f"An unexpected error occurred: {str(e)}. Please try again.")
+    else:
+        st.error("Please enter your response before submitting.")
+
+# Reruns on its own when a button in it is clicked, so answering costs the same at question 1 and question 50
+@st.fragment
+def interview_panel(history, history_rendered):
+    if 'pending_answer' in st.session_state:
+        evaluate_pending_answer(st.session_state.questions[st.session_state.current_question_index])
+    if 'recording_error' in st.session_state:
+        st.error(st.session_state.pop('recording_error'))
+
+    # Every answer has to be evaluated before the final assessment
+    finished = st.session_state.current_question_index >= len(st.session_state.questions)
+    if finished and st.session_state.background_evaluations:
+        with st.spinner("Collecting your evaluations..."):
+            collected = collect_evaluations(wait=True)
+    else:
+        collected = collect_evaluations()
 
-# Display current question
-if st.session_state.questions:
-    current_question = st.session_state.questions[st.session_state.current_question_index]
-    st.header(f"Question {st.session_state.current_question_index + 1}/{len(st.session_state.questions)}")
+    # Only answers given since the last full run are drawn here; earlier ones are already in the expander
+    with history:
+        for i in range(history_rendered, len(st.session_state.responses)):
+            display_response(i + 1, st.session_state.responses[i])
+
+    # A resumed interview may already be complete
+    if finished:
+        if not collected:
+            st.button("Retry Evaluation", use_container_width=True, on_click=retry_failed_evaluations)
+            return
+        display_final_assessment()
+        return
+
+    question_index = st.session_state.current_question_index
+    current_question = st.session_state.questions[question_index]
+    st.header(f"Question {question_index + 1}/{len(st.session_state.questions)}")
     st.markdown(f"""<div style='background-color: #f0f2f6; padding: 1.5rem; border-radius: 0.5rem; margin: 1rem 0;'>
         {current_question}
     </div>""", unsafe_allow_html=True)
 
     # Create two main columns for recording and text input
     left_col, right_col = st.columns([1, 1])
-    
+
     # Recording controls
     with left_col:
         st.markdown("### 🎤 Voice Response")
         if not st.session_state.recording:
-            if st.button("Start Recording", use_container_width=True):
-                record_audio()
+            st.button("Start Recording", use_container_width=True, on_click=record_audio, args=(current_question,))
         else:
-            if st.button("⏹️ Stop Recording", use_container_width=True):
-                if stop_recording():
-                    with st.spinner("Analyzing your response..."):
-                        analysis, text = analyze_response('temp_recording.wav')
-                        if analysis and text:
-                            st.session_state.responses.append({
-                                'question': current_question,
-                                'text': text,
-                                'analysis': analysis
-                            })
-                            if os.path.exists('temp_recording.wav'):
-                                os.remove('temp_recording.wav')
-                            
-                            display_analysis(analysis, text)
-
-    # Text input option
+            st.button("⏹️ Stop Recording", use_container_width=True, on_click=submit_recording)
+
+    # Text input option; keyed by question so the next question starts with an empty box
     with right_col:
         st.markdown("### ⌨️ Text Response")
-        text_response = st.text_area("Type your response here:", height=200)
-        submitted = st.button("Submit Response", use_container_width=True)
-        if submitted and text_response.strip():
-            with st.spinner("Analyzing your response..."):
-                try:
-                    response = requests.post(
-                        f"{API_URL}/analyze-response",
-                        json={"text": text_response},
-                        timeout=30  # Add timeout to prevent hanging
-                    )
-                    if response.status_code == 200:
-                        analysis = response.json()
-                        if isinstance(analysis, dict) and all(k in analysis for k in ['technical_score', 'communication_score', 'feedback']):
-                            st.session_state.responses.append({
-                                'question': current_question,
-                                'text': text_response,
-                                'analysis': analysis
-                            })
-                            display_analysis(analysis, text_response)
-                        else:
-                            st.error("Received invalid response format from server. Please try again.")
-                    else:
-                        error_msg = response.json().get('feedback', 'Failed to analyze response. Please try again.')
-                        st.error(error_msg)
-                except requests.exceptions.Timeout:
-                    st.error("Request timed out. Please try again.")
-                except requests.exceptions.RequestException as e:
-                    st.error(f"Connection error: {str(e)}. Please try again.")
-                except Exception as e:
-                    st.error(f"An unexpected error occurred: {str(e)}. Please try again.")
-        elif submitted:
-            st.error("Please enter your response before submitting.")
+        st.text_area("Type your response here:", height=200, key=f"text_response_{question_index}")
+        st.button("Submit Response", use_container_width=True, on_click=submit_text_response, args=(question_index,))
 
     # Display recording status
     if st.session_state.recording:
@@ -239,26 +418,27 @@ if st.session_state.questions:
             🔴 Recording in progress...
         </div>""", unsafe_allow_html=True)
 
-# Display progress with better styling
-st.markdown("### Progress")
-st.progress((st.session_state.current_question_index + 1) / len(st.session_state.questions))
-
-# Display previous responses with better formatting
-if st.session_state.responses:
-    with st.expander("📝 Previous Responses"):
-        for i, response in enumerate(st.session_state.responses):
-            st.markdown(f"**Question {i + 1}:**")
-            st.markdown(f"""<div style='background-color: #f0f2f6; padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;'>
-                {response['question']}
-            </div>""", unsafe_allow_html=True)
-            st.markdown("**Your Answer:**")
-            st.markdown(f"""<div style='padding: 1rem; border-left: 3px solid #1f77b4; margin-bottom: 1rem;'>
-                {response['text']}
-            </div>""", unsafe_allow_html=True)
-            st.markdown(f"**Technical Score:** {response['analysis']['technical_score']}/10")
-            st.markdown(f"**Communication Score:** {response['analysis']['communication_score']}/10")
-            st.markdown("**Feedback:**")
-            st.markdown(f"""<div style='padding: 1rem; background-color: #ffffff; border: 1px solid #ddd; border-radius: 0.5rem; margin-bottom: 1rem;'>
-                {response['analysis']['feedback']}
-            </div>""", unsafe_allow_html=True)
-            st.markdown("---")
\ No newline at end of file
+    # Display progress with better styling
+    st.markdown("### Progress")
+    st.progress(min(question_index + 1, len(st.session_state.questions)) / len(st.session_state.questions))
+
+# Main UI
+st.title("🎯 AI Technical Recruiter")
+
+# Create or resume the interview session if not already loaded
+if not st.session_state.questions:
+    with st.spinner("Loading interview questions..."):
+        if not load_session():
+            st.error("Failed to load questions. Please refresh the page to try again.")
+            st.stop()
+
+# The question area reruns on its own; history and styling are only drawn on full runs
+panel = st.container()
+history = st.expander("📝 Previous Responses")
+with history:
+    st.caption("Your answers and their feedback, in order.")
+    for i, response in enumerate(st.session_state.responses):
+        display_response(i + 1, response)
+
+with panel:
+    interview_panel(history, len(st.session_state.responses))
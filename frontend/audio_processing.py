@@ -0,0 +1,79 @@
+import io
+from math import gcd
+
+import numpy as np
+import scipy.io.wavfile as wav
+from scipy.signal import resample_poly
+
+# Speech recognizers work at 16 kHz, so anything above that is wasted upload
+TARGET_SAMPLE_RATE = 16000
+FRAME_MS = 20
+PADDING_MS = 200
+# Frames louder than this multiple of the noise floor count as speech
+SPEECH_TO_NOISE_RATIO = 3.0
+# Absolute RMS floor (full scale = 1.0) so a silent room is never "speech"
+MIN_SPEECH_RMS = 0.01
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Drop leading and trailing silence, keeping a little padding around speech.
+
+    Frame energies are computed in one vectorized pass; the noise floor is
+    the 10th percentile of frame RMS. Returns an empty array if no frame
+    rises above the speech threshold.
+    """
+    frame = max(1, sample_rate * FRAME_MS // 1000)
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return samples[:0]
+
+    frames = samples[:n_frames * frame].reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    threshold = max(float(np.percentile(rms, 10)) * SPEECH_TO_NOISE_RATIO, MIN_SPEECH_RMS)
+    voiced = np.flatnonzero(rms > threshold)
+    if voiced.size == 0:
+        return samples[:0]
+
+    padding = PADDING_MS // FRAME_MS
+    start = max(0, voiced[0] - padding) * frame
+    end = min(n_frames, voiced[-1] + 1 + padding) * frame
+    return samples[start:end]
+
+
+def preprocess_recording(audio: np.ndarray, sample_rate: int, recorded_frames: int) -> np.ndarray:
+    """Turn a raw float32 recording into compact 16 kHz int16 speech.
+
+    Keeps only the ``recorded_frames`` actually captured, trims silence,
+    resamples to 16 kHz and converts to 16-bit PCM.
+    """
+    samples = np.asarray(audio, dtype=np.float32).reshape(-1)[:recorded_frames]
+    samples = trim_silence(samples, sample_rate)
+    if samples.size == 0:
+        return np.zeros(0, dtype=np.int16)
+
+    if sample_rate != TARGET_SAMPLE_RATE:
+        divisor = gcd(TARGET_SAMPLE_RATE, sample_rate)
+        samples = resample_poly(samples, TARGET_SAMPLE_RATE // divisor, sample_rate // divisor)
+
+    return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+
+
+def encode_audio(samples: np.ndarray, compress: bool = False):
+    """Encode 16 kHz int16 samples for upload.
+
+    Returns ``(content, filename, mime_type)``. With ``compress`` the audio
+    is written as lossless FLAC if the optional ``soundfile`` package is
+    installed, otherwise as WAV.
+    """
+    buffer = io.BytesIO()
+    if compress:
+        try:
+            import soundfile
+        except ImportError:
+            pass
+        else:
+            soundfile.write(buffer, samples, TARGET_SAMPLE_RATE, format='FLAC')
+            return buffer.getvalue(), 'audio.flac', 'audio/flac'
+
+    wav.write(buffer, TARGET_SAMPLE_RATE, samples)
+    return buffer.getvalue(), 'audio.wav', 'audio/wav'
@@ -0,0 +1,24 @@
+import os
+
+from dotenv import load_dotenv
+
+from .base import EngineError, InterviewEngine, VoiceStream
+
+load_dotenv()
+
+# Where the HTTP transport finds the backend
+INTERVIEW_API_URL = os.getenv('INTERVIEW_API_URL', 'http://localhost:8000')
+
+TRANSPORTS = ('local', 'http')
+
+
+def create_engine(transport: str, api_url: str = INTERVIEW_API_URL) -> InterviewEngine:
+    """Return an engine that runs the backend in this process (``local``) or calls its API (``http``)."""
+    # Transports are imported on demand, so an HTTP-only frontend never loads the backend
+    if transport == 'local':
+        from .local import LocalEngine
+        return LocalEngine()
+    if transport == 'http':
+        from .remote import HttpEngine
+        return HttpEngine(api_url)
+    raise ValueError(f"Unknown interview engine transport '{transport}'; expected one of: {', '.join(TRANSPORTS)}")
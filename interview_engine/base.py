@@ -0,0 +1,88 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class EngineError(Exception):
+    """Raised when the interview engine cannot complete a request.
+
+    ``retry_after`` is set when the model is only temporarily unavailable.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class VoiceStream(ABC):
+    """A spoken answer that is transcribed while the candidate is still talking.
+
+    ``feed`` never blocks, so it can be called from an audio callback.
+    ``partials`` maps each transcribed segment's index to its text.
+    """
+
+    def __init__(self):
+        self.partials: Dict[int, str] = {}
+
+    @abstractmethod
+    def feed(self, pcm: bytes) -> None:
+        """Queue 16-bit mono PCM for transcription."""
+
+    @abstractmethod
+    def finish(self, timeout: float = 60) -> Tuple[str, Dict]:
+        """Transcribe the rest of the audio and return ``(text, analysis)``."""
+
+    @abstractmethod
+    def cancel(self) -> None:
+        """Stop transcribing and discard the answer."""
+
+
+class InterviewEngine(ABC):
+    """What the interview UIs need from the backend, wherever it runs.
+
+    Results are plain dicts shaped like the HTTP API's JSON responses, so a
+    UI works the same on either transport. Failures raise ``EngineError``.
+    """
+
+    @abstractmethod
+    def start_interview(self) -> Dict:
+        """Create a session and return it with its questions."""
+
+    @abstractmethod
+    def resume_interview(self, session_id: str) -> Optional[Dict]:
+        """Return a session with the answers evaluated so far, or ``None`` if it is unknown."""
+
+    @abstractmethod
+    def evaluate(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                 question_index: Optional[int] = None) -> Dict:
+        """Evaluate a typed answer, recording it in the session if one is given."""
+
+    @abstractmethod
+    def stream_evaluation(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        """Yield ``score`` and ``feedback`` events as the model writes, then ``result`` or ``error``."""
+
+    @abstractmethod
+    def submit_evaluation(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> 'Future[Dict]':
+        """Start evaluating a typed answer without waiting for it.
+
+        The returned future resolves to the analysis, or raises ``EngineError``.
+        """
+
+    @abstractmethod
+    def transcribe_and_evaluate(self, audio: bytes, filename: str, content_type: str, question: Optional[str] = None,
+                                session_id: Optional[str] = None, question_index: Optional[int] = None) -> Tuple[str, Dict]:
+        """Transcribe a recorded answer and evaluate it, returning ``(text, analysis)``."""
+
+    @abstractmethod
+    def open_voice_stream(self, sample_rate: int, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> VoiceStream:
+        """Start a spoken answer at ``sample_rate`` that is transcribed while the candidate talks."""
+
+    @abstractmethod
+    def evaluate_interview(self, answers: List[Dict], mode: Optional[str] = None) -> Dict:
+        """Evaluate ``[{"question": ..., "text": ...}, ...]`` and return the results with the verdict."""
+
+    def close(self) -> None:
+        pass
@@ -0,0 +1,182 @@
+import asyncio
+import atexit
+import concurrent.futures
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Iterator, List, Optional, Tuple, TypeVar
+
+from backend import service
+from backend.models import InterviewAnswer
+from backend.scheduler import LLMUnavailableError
+from backend.sessions import SessionNotFound
+
+from .base import EngineError, InterviewEngine, VoiceStream
+
+T = TypeVar('T')
+
+NO_SPEECH = "No speech was recognized. Please try again."
+
+
+@contextmanager
+def _translated():
+    # Service failures reach the UI as EngineError, as they do over HTTP
+    try:
+        yield
+    except EngineError:
+        raise
+    except LLMUnavailableError as e:
+        raise EngineError(str(e), e.retry_after) from e
+    except concurrent.futures.TimeoutError as e:
+        raise EngineError("Request timed out. Please try again.") from e
+    except Exception as e:
+        # speech_recognition reports unintelligible audio with an empty message
+        raise EngineError(str(e) or NO_SPEECH) from e
+
+
+class LocalVoiceStream(VoiceStream):
+    """Transcribes audio on the engine's event loop while the candidate speaks."""
+
+    def __init__(self, engine: 'LocalEngine', sample_rate: int, question: Optional[str],
+                 session_id: Optional[str], question_index: Optional[int]):
+        super().__init__()
+        self._engine = engine
+        self._session_id = session_id
+        self._question_index = question_index
+        self._error: Optional[Exception] = None
+
+        async def open_stream():
+            resolved = await service.session_question(session_id, question_index, question)
+            return resolved, service.transcription_stream(sample_rate, self._on_segment)
+
+        self._question, self._stream = engine._call(open_stream())
+
+    async def _on_segment(self, index: int, text: str) -> None:
+        self.partials[index] = text
+
+    def feed(self, pcm: bytes) -> None:
+        self._engine._loop.call_soon_threadsafe(self._feed, pcm)
+
+    def _feed(self, pcm: bytes) -> None:
+        # Runs on the loop; a stream over its length limit stops transcribing and fails on finish
+        if self._error is not None:
+            return
+        try:
+            self._stream.feed(pcm)
+        except Exception as e:
+            self._error = e
+            self._stream.cancel()
+
+    def finish(self, timeout: float = 60) -> Tuple[str, Dict]:
+        async def run():
+            # Scheduled after every pending feed, so the whole recording is included
+            if self._error is not None:
+                raise self._error
+            text = await self._stream.finish()
+            if not text:
+                raise EngineError(NO_SPEECH)
+            analysis = await service.evaluate_answer(text, self._question, self._session_id, self._question_index)
+            return text, dict(analysis)
+
+        return self._engine._call(run(), timeout)
+
+    def cancel(self) -> None:
+        self._engine._loop.call_soon_threadsafe(self._stream.cancel)
+
+
+class LocalEngine(InterviewEngine):
+    """Runs the backend's interview service inside this process.
+
+    The service is asynchronous, so it runs on a private event loop in a
+    daemon thread and calls from UI threads wait on that loop. Nothing is
+    serialized and no request crosses the network.
+    """
+
+    def __init__(self):
+        self._closed = False
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name='interview-engine', daemon=True).start()
+        self._call(service.start())
+        # Flush recorded answers and release connections when the process exits
+        atexit.register(self.close)
+
+    def _call(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        with _translated():
+            return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    def start_interview(self) -> Dict:
+        return self._call(service.create_session())
+
+    def resume_interview(self, session_id: str) -> Optional[Dict]:
+        try:
+            return self._call(service.get_session(session_id))
+        except EngineError as e:
+            if isinstance(e.__cause__, SessionNotFound):
+                return None
+            raise
+
+    def evaluate(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                 question_index: Optional[int] = None) -> Dict:
+        async def run():
+            resolved = await service.session_question(session_id, question_index, question)
+            return await service.evaluate_answer(text, resolved, session_id, question_index)
+
+        return dict(self._call(run()))
+
+    def submit_evaluation(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> 'concurrent.futures.Future[Dict]':
+        # Runs as a task on the engine's loop, so no thread waits on it
+        async def run():
+            with _translated():
+                resolved = await service.session_question(session_id, question_index, question)
+                return dict(await service.evaluate_answer(text, resolved, session_id, question_index))
+
+        return asyncio.run_coroutine_threadsafe(run(), self._loop)
+
+    def stream_evaluation(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        # The service's async generator runs on the loop and hands events over through a queue
+        events = queue.Queue()
+
+        async def pump():
+            try:
+                resolved = await service.session_question(session_id, question_index, question)
+                async for item in service.stream_evaluation(text, resolved, session_id, question_index):
+                    events.put(item)
+            finally:
+                events.put(None)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), self._loop)
+        try:
+            while (item := events.get()) is not None:
+                yield item
+            with _translated():
+                future.result()
+        finally:
+            # Stops the model call if the caller abandons the stream
+            future.cancel()
+
+    def transcribe_and_evaluate(self, audio: bytes, filename: str, content_type: str, question: Optional[str] = None,
+                                session_id: Optional[str] = None, question_index: Optional[int] = None) -> Tuple[str, Dict]:
+        # The audio format is detected from its contents, so the file name and type are not needed
+        async def run():
+            resolved = await service.session_question(session_id, question_index, question)
+            text = await service.transcribe(audio)
+            return text, dict(await service.evaluate_answer(text, resolved, session_id, question_index))
+
+        return self._call(run())
+
+    def open_voice_stream(self, sample_rate: int, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> VoiceStream:
+        return LocalVoiceStream(self, sample_rate, question, session_id, question_index)
+
+    def evaluate_interview(self, answers: List[Dict], mode: Optional[str] = None) -> Dict:
+        evaluation = self._call(service.evaluate_interview([InterviewAnswer(**answer) for answer in answers], mode))
+        return evaluation.model_dump()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._call(service.stop())
+        self._loop.call_soon_threadsafe(self._loop.stop)
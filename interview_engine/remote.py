@@ -0,0 +1,171 @@
+import json
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+from .base import EngineError, InterviewEngine, VoiceStream
+
+
+def _error(response: requests.Response) -> EngineError:
+    # The API reports failures as {"error": ...} or FastAPI's {"detail": ...}
+    try:
+        body = response.json()
+        message = body.get('error') or body.get('detail') or response.text
+    except ValueError:
+        message = response.text
+    retry_after = response.headers.get('Retry-After')
+    return EngineError(str(message), float(retry_after) if retry_after else None)
+
+
+class HttpVoiceStream(VoiceStream):
+    """Streams audio to the backend's ``/ws/transcribe`` WebSocket."""
+
+    def __init__(self, ws_url: str, config: Dict):
+        super().__init__()
+        from websockets.sync.client import connect
+
+        self.result = None
+        self.error = None
+        self._frames = queue.Queue()
+        self._ws = connect(f"{ws_url}/ws/transcribe")
+        self._ws.send(json.dumps(config))
+        self._sender = threading.Thread(target=self._send_frames, daemon=True)
+        self._receiver = threading.Thread(target=self._receive, daemon=True)
+        self._sender.start()
+        self._receiver.start()
+
+    def feed(self, pcm: bytes) -> None:
+        self._frames.put(pcm)
+
+    def _send_frames(self):
+        while True:
+            chunk = self._frames.get()
+            if chunk is None:
+                break
+            self._ws.send(chunk)
+        self._ws.send(json.dumps({"event": "stop"}))
+
+    def _receive(self):
+        try:
+            for message in self._ws:
+                data = json.loads(message)
+                if data['event'] == 'partial':
+                    self.partials[data['index']] = data['text']
+                elif data['event'] == 'final':
+                    self.result = data
+                elif data['event'] == 'error':
+                    self.error = data['error']
+        except Exception as e:
+            self.error = self.error or str(e)
+
+    def finish(self, timeout: float = 60) -> Tuple[str, Dict]:
+        self._frames.put(None)
+        self._receiver.join(timeout)
+        self._ws.close()
+        if self.result is None:
+            raise EngineError(self.error or "No response from the backend.")
+        return self.result['text'], self.result['analysis']
+
+    def cancel(self) -> None:
+        self._ws.close()
+
+
+class HttpEngine(InterviewEngine):
+    """Calls a backend running as a separate service over its HTTP API."""
+
+    def __init__(self, api_url: str, timeout: float = 60, background_workers: int = 8):
+        self.api_url = api_url.rstrip('/')
+        self.ws_url = self.api_url.replace('http', 'ws', 1)
+        self.timeout = timeout
+        # One pooled session so backend connections are reused across calls
+        self._http = requests.Session()
+        # Background evaluations wait on the backend from these threads
+        self._background = ThreadPoolExecutor(max_workers=background_workers, thread_name_prefix='interview-engine')
+
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', self.timeout)
+        try:
+            return self._http.request(method, f"{self.api_url}{path}", **kwargs)
+        except requests.exceptions.Timeout:
+            raise EngineError("Request timed out. Please try again.")
+        except requests.exceptions.RequestException as e:
+            raise EngineError(f"Error connecting to the backend: {str(e)}")
+
+    def _json(self, method: str, path: str, **kwargs) -> Dict:
+        response = self._request(method, path, **kwargs)
+        if response.status_code != 200:
+            raise _error(response)
+        return response.json()
+
+    def start_interview(self) -> Dict:
+        return self._json('POST', '/sessions')
+
+    def resume_interview(self, session_id: str) -> Optional[Dict]:
+        response = self._request('GET', f"/sessions/{session_id}")
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise _error(response)
+        return response.json()
+
+    def evaluate(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                 question_index: Optional[int] = None) -> Dict:
+        return self._json('POST', '/analyze-response', json={
+            "text": text, "question": question, "session_id": session_id, "question_index": question_index
+        })
+
+    def submit_evaluation(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> 'Future[Dict]':
+        return self._background.submit(self.evaluate, text, question, session_id, question_index)
+
+    def stream_evaluation(self, text: str, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+        response = self._request(
+            'POST', '/analyze-response/stream',
+            json={"text": text, "question": question, "session_id": session_id, "question_index": question_index},
+            stream=True,
+            timeout=30  # Applies to each read, so long evaluations keep streaming
+        )
+        with response:
+            if response.status_code != 200:
+                raise _error(response)
+            event = None
+            try:
+                for line in response.iter_lines(decode_unicode=True):
+                    if line.startswith('event:'):
+                        event = line[len('event:'):].strip()
+                    elif line.startswith('data:'):
+                        yield event, json.loads(line[len('data:'):].strip())
+            except requests.exceptions.RequestException as e:
+                raise EngineError(f"Connection error: {str(e)}. Please try again.")
+
+    def transcribe_and_evaluate(self, audio: bytes, filename: str, content_type: str, question: Optional[str] = None,
+                                session_id: Optional[str] = None, question_index: Optional[int] = None) -> Tuple[str, Dict]:
+        # Transcription and evaluation happen in a single backend round trip
+        data = {"question": question, "session_id": session_id, "question_index": question_index}
+        result = self._json(
+            'POST', '/transcribe-and-analyze',
+            files={'audio': (filename, audio, content_type)},
+            data={k: v for k, v in data.items() if v is not None}
+        )
+        return result['text'], result['analysis']
+
+    def open_voice_stream(self, sample_rate: int, question: Optional[str] = None, session_id: Optional[str] = None,
+                          question_index: Optional[int] = None) -> VoiceStream:
+        try:
+            return HttpVoiceStream(self.ws_url, {
+                "sample_rate": sample_rate, "question": question,
+                "session_id": session_id, "question_index": question_index
+            })
+        except Exception as e:
+            raise EngineError(f"Error connecting to the backend: {str(e)}")
+
+    def evaluate_interview(self, answers: List[Dict], mode: Optional[str] = None) -> Dict:
+        return self._json('POST', '/evaluate-interview', json={"answers": answers, "mode": mode})
+
+    def close(self) -> None:
+        self._background.shutdown(wait=False, cancel_futures=True)
+        self._http.close()
@@ -1,97 +1,67 @@
 import streamlit as st
 import os
-from openai import OpenAI
-from dotenv import load_dotenv
-from typing import Dict
+from typing import Dict, Optional
 
-# Load environment variables
-load_dotenv()
+from interview_engine import EngineError, create_engine
 
-# Initialize OpenAI client
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
+# "local" runs the interview backend inside this app; "http" calls its API at INTERVIEW_API_URL
+INTERVIEW_ENGINE = os.getenv('INTERVIEW_ENGINE', 'local')
 
-def get_questions():
-    try:
-        completion = client.chat.completions.create(
-            model=os.getenv('GPT_MODEL'),
-            messages=[
-                {"role": "system", "content": "You are an expert technical interviewer for backend developer positions. Generate challenging but fair questions that assess both theoretical knowledge and practical experience."}, 
-                {"role": "user", "content": "Generate 5 technical interview questions for a backend developer position, focusing on System Design, API Development, Database Management, Security, and Problem Solving. Return only a JSON array of question strings without any additional formatting or explanation."}
-            ]
-        )
-        response_text = completion.choices[0].message.content.strip()
-        try:
-            import json
-            questions = json.loads(response_text)
-            if isinstance(questions, list) and len(questions) > 0:
-                return questions
-        except json.JSONDecodeError:
-            import re
-            array_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            if array_match:
-                try:
-                    questions = json.loads(array_match.group())
-                    if isinstance(questions, list) and len(questions) > 0:
-                        return questions
-                except:
-                    pass
-        return []
-    except Exception as e:
-        st.error(f"Error generating questions: {e}")
-        return []
+# Evaluate answers in the background and show the next question straight away
+PIPELINED_INTERVIEW = os.getenv('PIPELINED_INTERVIEW', 'false').lower() in ('1', 'true', 'yes')
 
+@st.cache_resource
+def get_engine():
+    # Built once per process and shared by every browser session, so identical in-flight evaluations run once
+    return create_engine(INTERVIEW_ENGINE)
 
+def start_interview():
+    try:
+        session = get_engine().start_interview()
+    except EngineError as e:
+        st.error(f"Error generating questions: {e}")
+        return False
+    st.session_state.session_id = session['session_id']
+    st.session_state.questions = session['questions']
+    return True
 
-def analyze_response(text: str) -> Dict:
-    if not text.strip():
-        return {
-            "technical_score": 0.0,
-            "communication_score": 0.0,
-            "feedback": "Please provide a response before submitting."
-        }
-
+def analyze_response(text: str, question_index: int) -> Optional[Dict]:
     try:
-        completion = client.chat.completions.create(
-            model=os.getenv('GPT_MODEL'),
-            messages=[
-                {"role": "system", "content": "You are an expert technical interviewer evaluating a backend developer candidate's response. Provide constructive feedback that highlights both strengths and areas for improvement."}, 
-                {"role": "user", "content": f"Evaluate this response to a backend development question:\n{text}\n\nProvide evaluation in JSON format with keys: technical_score (0-10), communication_score (0-10), and feedback (string)"}
-            ]
-        )
-        
-        response_text = completion.choices[0].message.content.strip()
-        
+        # Uses the backend's prompts and cache, and records the answer in the interview session
+        return get_engine().evaluate(text, session_id=st.session_state.session_id, question_index=question_index)
+    except EngineError as e:
+        st.error(f"Error analyzing response: {e}")
+        return None
+
+def evaluate_in_background(text):
+    question_index = st.session_state.current_question_index
+    future = get_engine().submit_evaluation(text, session_id=st.session_state.session_id, question_index=question_index)
+    st.session_state.background_evaluations[question_index] = (st.session_state.questions[question_index], text, future)
+    st.session_state.current_question_index += 1
+
+def collect_evaluations(wait=False):
+    # Finished evaluations join the responses in question order, so the history stays numbered correctly
+    pending = st.session_state.background_evaluations
+    for question_index in sorted(pending):
+        question, text, future = pending[question_index]
+        if not (wait or future.done()):
+            break
         try:
-            analysis = json.loads(response_text)
-        except json.JSONDecodeError:
-            import re
-            scores = re.findall(r'(["\']?(?:technical|communication)_score["\']?)\s*:\s*(\d+(?:\.\d+)?)', response_text, re.I)
-            feedback = re.search(r'["\']?feedback["\']?\s*:\s*["\']([^"]+)["\']', response_text)
-            
-            if scores and feedback:
-                analysis = {
-                    'technical_score': float(next(score[1] for score in scores if 'technical' in score[0].lower())),
-                    'communication_score': float(next(score[1] for score in scores if 'communication' in score[0].lower())),
-                    'feedback': feedback.group(1)
-                }
-            else:
-                analysis = {
-                    'technical_score': 0.0,
-                    'communication_score': 0.0,
-                    'feedback': 'Could not analyze response format. Please try rephrasing your answer.'
-                }
-        
-        analysis['technical_score'] = max(0.0, min(10.0, float(analysis.get('technical_score', 0.0))))
-        analysis['communication_score'] = max(0.0, min(10.0, float(analysis.get('communication_score', 0.0))))
-        analysis['feedback'] = str(analysis.get('feedback', 'No feedback provided.'))
-        
-        return analysis
-    except Exception as e:
-        return {
-            "technical_score": 0.0,
-            "communication_score": 0.0,
-            "feedback": f"An error occurred while analyzing your response. Please try again."
-        }
+            analysis = future.result()
+        except EngineError as e:
+            st.error(f"Could not evaluate your answer to question {question_index + 1}: {e}")
+            return False
+        del pending[question_index]
+        st.session_state.responses.append({'question': question, 'text': text, 'analysis': analysis})
+    return True
+
+def retry_failed_evaluations():
+    pending = st.session_state.background_evaluations
+    for question_index, (question, text, future) in list(pending.items()):
+        if future.done() and future.exception() is not None:
+            pending[question_index] = (question, text, get_engine().submit_evaluation(
+                text, session_id=st.session_state.session_id, question_index=question_index
+            ))
 
 def display_analysis(analysis, text):
     st.markdown("### Analysis Results")
@@ -105,12 +75,23 @@ def display_analysis(analysis, text):
     st.markdown(f"""<div style='padding: 1rem; background-color: #ffffff; border: 1px solid #ddd; border-radius: 0.5rem; margin: 1rem 0;'>
         {analysis['feedback']}
     </div>""", unsafe_allow_html=True)
-    
-    if st.session_state.current_question_index < len(st.session_state.questions) - 1:
-        st.session_state.current_question_index += 1
-        st.rerun()
-    else:
-        display_final_assessment()
+
+def display_response(number, response):
+    st.markdown(f"**Question {number}:**")
+    st.markdown(f"""<div style='background-color: #f0f2f6; padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;'>
+        {response['question']}
+    </div>""", unsafe_allow_html=True)
+    st.markdown("**Your Answer:**")
+    st.markdown(f"""<div style='padding: 1rem; border-left: 3px solid #1f77b4; margin-bottom: 1rem;'>
+        {response['text']}
+    </div>""", unsafe_allow_html=True)
+    st.markdown(f"**Technical Score:** {response['analysis']['technical_score']}/10")
+    st.markdown(f"**Communication Score:** {response['analysis']['communication_score']}/10")
+    st.markdown("**Feedback:**")
+    st.markdown(f"""<div style='padding: 1rem; background-color: #ffffff; border: 1px solid #ddd; border-radius: 0.5rem; margin-bottom: 1rem;'>
+        {response['analysis']['feedback']}
+    </div>""", unsafe_allow_html=True)
+    st.markdown("---")
 
 def display_final_assessment():
     if not st.session_state.responses:
@@ -176,61 +157,93 @@ if 'questions' not in st.session_state:
 if 'responses' not in st.session_state:
     st.session_state.responses = []
 
+# question_index: (question, answer, future) for answers still being evaluated in pipelined mode
+if 'background_evaluations' not in st.session_state:
+    st.session_state.background_evaluations = {}
 
 
-# Main UI
-st.title("🎯 AI Technical Recruiter")
-
-# Fetch questions if not already loaded
-if not st.session_state.questions:
-    with st.spinner("Loading interview questions..."):
-        st.session_state.questions = get_questions()
-        if not st.session_state.questions:
-            st.error("Failed to load questions. Please refresh the page to try again.")
-            st.stop()
 
-# Display current question
-if st.session_state.questions:
-    current_question = st.session_state.questions[st.session_state.current_question_index]
-    st.header(f"Question {st.session_state.current_question_index + 1}/{len(st.session_state.questions)}")
-    st.markdown(f"""<div style='background-color: #f0f2f6; padding: 1.5rem; border-radius: 0.5rem; margin: 1rem 0;'>
-        {current_question}
-    </div>""", unsafe_allow_html=True)
+def submit_response(question_index):
+    # Runs before the panel redraws, so the redraw evaluates the answer and then shows the next question
+    st.session_state.pending_answer = st.session_state.get(f"text_response_{question_index}", "")
 
-    # Text input option
-    with st.container():
-        st.markdown("### ⌨️ Text Response")
-        text_response = st.text_area("Type your response here:", height=200)
-        submitted = st.button("Submit Response", use_container_width=True)
-        if submitted and text_response.strip():
+# Reruns on its own when its button is clicked, so answering does not redraw the rest of the page
+@st.fragment
+def interview_panel(history, history_rendered):
+    if 'pending_answer' in st.session_state:
+        text_response = st.session_state.pop('pending_answer')
+        if text_response.strip() and PIPELINED_INTERVIEW:
+            # The candidate moves on while the model works; results are gathered before the final assessment
+            evaluate_in_background(text_response)
+            st.info("Answer submitted. It is being evaluated while you continue.")
+        elif text_response.strip():
             with st.spinner("Analyzing your response..."):
-                analysis = analyze_response(text_response)
+                analysis = analyze_response(text_response, st.session_state.current_question_index)
+            # On failure the candidate stays on this question, with their answer still in the box, to try again
+            if analysis is not None:
                 st.session_state.responses.append({
-                    'question': current_question,
+                    'question': st.session_state.questions[st.session_state.current_question_index],
                     'text': text_response,
                     'analysis': analysis
                 })
                 display_analysis(analysis, text_response)
-        elif submitted:
+                st.session_state.current_question_index += 1
+        else:
             st.error("Please enter your response before submitting.")
 
+    # Every answer has to be evaluated before the final assessment
+    finished = st.session_state.current_question_index >= len(st.session_state.questions)
+    if finished and st.session_state.background_evaluations:
+        with st.spinner("Collecting your evaluations..."):
+            collected = collect_evaluations(wait=True)
+    else:
+        collected = collect_evaluations()
+
+    # Only answers given since the last full run are drawn here; earlier ones are already in the expander
+    with history:
+        for i in range(history_rendered, len(st.session_state.responses)):
+            display_response(i + 1, st.session_state.responses[i])
+
+    if finished:
+        if not collected:
+            st.button("Retry Evaluation", use_container_width=True, on_click=retry_failed_evaluations)
+            return
+        display_final_assessment()
+        return
+
+    question_index = st.session_state.current_question_index
+    st.header(f"Question {question_index + 1}/{len(st.session_state.questions)}")
+    st.markdown(f"""<div style='background-color: #f0f2f6; padding: 1.5rem; border-radius: 0.5rem; margin: 1rem 0;'>
+        {st.session_state.questions[question_index]}
+    </div>""", unsafe_allow_html=True)
+
+    # Text input option; keyed by question so the next question starts with an empty box
+    with st.container():
+        st.markdown("### ⌨️ Text Response")
+        st.text_area("Type your response here:", height=200, key=f"text_response_{question_index}")
+        st.button("Submit Response", use_container_width=True, on_click=submit_response, args=(question_index,))
+
+    # Display progress
+    st.markdown("### Progress")
+    st.progress((question_index + 1) / len(st.session_state.questions))
+
+# Main UI
+st.title("🎯 AI Technical Recruiter")
+
+# Fetch questions if not already loaded
+if not st.session_state.questions:
+    with st.spinner("Loading interview questions..."):
+        if not start_interview():
+            st.error("Failed to load questions. Please refresh the page to try again.")
+            st.stop()
 
+# The question area reruns on its own; history and styling are only drawn on full runs
+panel = st.container()
+history = st.expander("📝 Previous Responses")
+with history:
+    st.caption("Your answers and their feedback, in order.")
+    for i, response in enumerate(st.session_state.responses):
+        display_response(i + 1, response)
 
-# Display progress
-st.markdown("### Progress")
-st.progress((st.session_state.current_question_index + 1) / len(st.session_state.questions))
-
-# Display previous responses
-if st.session_state.responses:
-    with st.expander("📝 Previous Responses"):
-        for i, response in enumerate(st.session_state.responses):
-            st.markdown(f"**Question {i + 1}:**")
-            st.markdown(f"""<div style='background-color: #f0f2f6; padding: 1rem; border-radius: 0.5rem; margin-bottom: 1rem;'>
-                {response['question']}
-            </div>""", unsafe_allow_html=True)
-            st.markdown("**Your Answer:**")
-            st.markdown(f"""<div style='padding: 1rem; border-left: 3px solid #1f77b4; margin-bottom: 1rem;'>
-                {response['text']}
-            </div>""", unsafe_allow_html=True)
-            st.markdown(f"**Technical Score:** {response['analysis']['technical_score']}/10")
-            st
\ No newline at end of file
+with panel:
+    interview_panel(history, len(st.session_state.responses))
@@ -0,0 +1,26 @@
+import pytest
+
+from backend.parsing import ParseError, parse_analysis
+
+
+def test_scores_written_out_of_ten():
+    analysis = parse_analysis('{"technical_score": 8/10, "communication_score": 7/10, "feedback": "Clear answer."}')
+    assert (analysis.technical_score, analysis.communication_score) == (8.0, 7.0)
+    assert analysis.feedback == "Clear answer."
+
+
+def test_single_quoted_keys():
+    analysis = parse_analysis("{'technical_score': 8, 'communication_score': 6, 'feedback': 'Covers the basics.'}")
+    assert (analysis.technical_score, analysis.communication_score) == (8.0, 6.0)
+    assert analysis.feedback == "Covers the basics."
+
+
+def test_unquoted_key_lines():
+    analysis = parse_analysis("Evaluation:\ntechnical_score: 9\ncommunication_score: 4/5\nfeedback: Strong design.\n")
+    assert (analysis.technical_score, analysis.communication_score) == (9.0, 8.0)
+    assert analysis.feedback == "Strong design."
+
+
+def test_error_names_what_failed():
+    with pytest.raises(ParseError, match="double-quoted object key.*no technical_score or communication_score"):
+        parse_analysis("{'technical_score': 'high'}")